@@ -23,9 +23,84 @@ class Config:
 
     # OpenAI settings
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+    OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", 50))
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS = int(
+        os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", 20)
+    )
+    OPENAI_KEEPALIVE_EXPIRY = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", 60.0))
+    OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", 60.0))
+    OPENAI_CONNECT_TIMEOUT = float(os.getenv("OPENAI_CONNECT_TIMEOUT", 5.0))
+    OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", 2))
+
+    # Embedding settings (the API allows 2048 inputs and 300k tokens a request)
+    EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", 512))
+    EMBEDDING_BATCH_MAX_TOKENS = int(os.getenv("EMBEDDING_BATCH_MAX_TOKENS", 250000))
+    EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", 10000))
+    EMBEDDING_CACHE_MAX_AGE_DAYS = int(os.getenv("EMBEDDING_CACHE_MAX_AGE_DAYS", 30))
+    QUERY_EMBEDDING_CACHE_MAX_ENTRIES = int(
+        os.getenv("QUERY_EMBEDDING_CACHE_MAX_ENTRIES", 1024)
+    )
+    QUERY_EMBEDDING_CACHE_TTL = int(os.getenv("QUERY_EMBEDDING_CACHE_TTL", 60 * 60))
+    EMBEDDING_WORKERS = int(os.getenv("EMBEDDING_WORKERS", 1))
+    EMBEDDING_JOB_BATCH_SIZE = int(os.getenv("EMBEDDING_JOB_BATCH_SIZE", 10))
+    EMBEDDING_JOB_LEASE_SECONDS = int(os.getenv("EMBEDDING_JOB_LEASE_SECONDS", 600))
+    EMBEDDING_JOB_MAX_ATTEMPTS = int(os.getenv("EMBEDDING_JOB_MAX_ATTEMPTS", 3))
+    EMBEDDING_GRAPH_DEBOUNCE_SECONDS = float(
+        os.getenv("EMBEDDING_GRAPH_DEBOUNCE_SECONDS", 10)
+    )
+
+    # Tool settings
+    TOOL_RESULT_MAX_TOKENS = int(os.getenv("TOOL_RESULT_MAX_TOKENS", 2000))
+    TOOL_OUTPUT_DIR = BASE_DIR / "notebooks" / "tool_outputs"
+    TOOL_DEFAULT_TIMEOUT = float(os.getenv("TOOL_DEFAULT_TIMEOUT", 60.0))
+    TOOL_MAX_THREADS = int(os.getenv("TOOL_MAX_THREADS", 16))
+    TOOL_HTTP_TIMEOUT = float(os.getenv("TOOL_HTTP_TIMEOUT", 10.0))
+    TOOL_HTTP_RETRIES = int(os.getenv("TOOL_HTTP_RETRIES", 2))
+    TOOL_HTTP_MAX_CONNECTIONS = int(os.getenv("TOOL_HTTP_MAX_CONNECTIONS", 20))
+    TOOL_HTTP_MAX_CONCURRENCY = int(os.getenv("TOOL_HTTP_MAX_CONCURRENCY", 10))
+    TOOL_HISTORY_MAX_ENTRIES = int(os.getenv("TOOL_HISTORY_MAX_ENTRIES", 50))
+    TOOL_HOT_RELOAD = (
+        os.getenv("TOOL_HOT_RELOAD", os.getenv("DEBUG", "False")).lower() == "true"
+    )
+
+    # Jupyter kernel settings
+    KERNEL_POOL_SIZE = int(os.getenv("KERNEL_POOL_SIZE", 2))
+    KERNEL_WARMUP_CODE = os.getenv("KERNEL_WARMUP_CODE", "import numpy, pandas")
+    KERNEL_STARTUP_TIMEOUT = float(os.getenv("KERNEL_STARTUP_TIMEOUT", 60.0))
+    KERNEL_MAX_COUNT = int(os.getenv("KERNEL_MAX_COUNT", 8))
+    KERNEL_IDLE_TIMEOUT = float(os.getenv("KERNEL_IDLE_TIMEOUT", 30 * 60))
+    KERNEL_MEMORY_LIMIT_MB = int(os.getenv("KERNEL_MEMORY_LIMIT_MB", 4096))
+    KERNEL_CPU_LIMIT_SECONDS = int(os.getenv("KERNEL_CPU_LIMIT_SECONDS", 0))
+    # Kept below TOOL_RESULT_MAX_TOKENS so the preview is never compacted again
+    KERNEL_OUTPUT_PREVIEW_TOKENS = int(os.getenv("KERNEL_OUTPUT_PREVIEW_TOKENS", 1500))
+
+    # Geocoding settings
+    GAZETTEER_PATH = Path(
+        os.getenv("GAZETTEER_PATH", BASE_DIR / "app" / "data" / "cities.tsv")
+    )
+    GAZETTEER_ADMIN1_PATH = Path(
+        os.getenv(
+            "GAZETTEER_ADMIN1_PATH", BASE_DIR / "app" / "data" / "admin1_codes.tsv"
+        )
+    )
+    GAZETTEER_INDEX_PATH = Path(
+        os.getenv("GAZETTEER_INDEX_PATH", BASE_DIR / ".cache" / "gazetteer.idx")
+    )
+    USER_LOCATION = os.getenv("USER_LOCATION")
+    USER_LOCATION_TTL = int(os.getenv("USER_LOCATION_TTL", 60 * 60))
 
     # Application settings
     DEBUG = os.getenv("DEBUG", "False").lower() == "true"
+    TEMPLATE_DIR = Path(os.getenv("TEMPLATE_DIR", BASE_DIR / "app" / "views"))
+    TEMPLATE_CACHE_DIR = Path(
+        os.getenv("TEMPLATE_CACHE_DIR", BASE_DIR / ".cache" / "templates")
+    )
+
+    # Chat completion cache settings (opt-in, temperature 0 only)
+    CHAT_CACHE_ENABLED = os.getenv("CHAT_CACHE_ENABLED", "False").lower() == "true"
+    CHAT_CACHE_DIR = Path(os.getenv("CHAT_CACHE_DIR", BASE_DIR / ".cache" / "chat"))
+    CHAT_CACHE_TTL = int(os.getenv("CHAT_CACHE_TTL", 7 * 24 * 60 * 60))
+    CHAT_CACHE_MAX_ENTRIES = int(os.getenv("CHAT_CACHE_MAX_ENTRIES", 256))
 
     @classmethod
     def get_database_url(cls) -> str:
@@ -0,0 +1,177 @@
+import hashlib
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Any, List, Optional
+
+from app.utils.tokenizer import count_tokens, decode, encode
+
+# Progressively tighter (max string chars, max list items) for "structure"
+_STRUCTURE_LIMITS = [(2000, 50), (800, 20), (300, 10), (100, 5)]
+
+# Progressively shorter snippet lengths for "snippets"
+_SNIPPET_LENGTHS = [1200, 500, 200]
+
+
+def serialize_result(result: Any) -> str:
+    """Convert a tool result into the text sent to the model"""
+    if isinstance(result, str):
+        return result
+    return json.dumps(result, default=str)
+
+
+def fits(text: str, max_tokens: int) -> bool:
+    # Every token covers at least one UTF-8 byte, so short text always fits
+    return len(text.encode("utf-8")) <= max_tokens or count_tokens(text) <= max_tokens
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to at most `max_tokens` tokens, noting how much was dropped"""
+    if fits(text, max_tokens):
+        return text
+    # Avoid tokenizing megabytes of output: no token is longer than ~16 chars
+    tokens = encode(text[: max_tokens * 16])
+    kept = decode(tokens[: max(max_tokens - 20, 0)])
+    return f"{kept}\n... [truncated {len(text) - len(kept)} characters]"
+
+
+def compact_result(
+    result: Any,
+    *,
+    max_tokens: int,
+    strategy: str = "auto",
+    spill_dir: Optional[Path] = None,
+    label: str = "tool",
+) -> str:
+    """Serialize a tool result so that it fits within `max_tokens`
+
+    Strategies:
+        truncate:  cut the serialized text
+        structure: keep the JSON shape, shortening long strings and lists
+        snippets:  shorten each entry of a ``results`` list, dropping the tail
+        spill:     write the full output to a file and return a preview
+        auto:      ``structure`` for dicts/lists, ``truncate`` otherwise
+    """
+    text = serialize_result(result)
+    if fits(text, max_tokens):
+        return text
+
+    if strategy == "auto":
+        strategy = "structure" if isinstance(result, (dict, list)) else "truncate"
+
+    if strategy == "structure":
+        text = _compact_structure(result, max_tokens)
+    elif strategy == "snippets":
+        text = _compact_snippets(result, max_tokens)
+    elif strategy == "spill":
+        text = _spill(text, max_tokens, spill_dir, label)
+
+    # Whatever the strategy produced, never exceed the budget
+    return truncate_to_tokens(text, max_tokens)
+
+
+def _shrink(value: Any, max_chars: int, max_items: int) -> Any:
+    if isinstance(value, str):
+        if len(value) <= max_chars:
+            return value
+        return f"{value[:max_chars]}... [{len(value) - max_chars} more characters]"
+    if isinstance(value, dict):
+        return {k: _shrink(v, max_chars, max_items) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        items = [_shrink(v, max_chars, max_items) for v in value[:max_items]]
+        if len(value) > max_items:
+            items.append(f"... [{len(value) - max_items} more items]")
+        return items
+    return value
+
+
+def _compact_structure(result: Any, max_tokens: int) -> str:
+    if not isinstance(result, (dict, list, tuple)):
+        return serialize_result(result)
+
+    text = serialize_result(result)
+    for max_chars, max_items in _STRUCTURE_LIMITS:
+        text = serialize_result(_shrink(result, max_chars, max_items))
+        if fits(text, max_tokens):
+            break
+    return text
+
+
+def _snippet(text: str, query: str, length: int) -> str:
+    """Return a window of `text` around the first query term it contains"""
+    if len(text) <= length:
+        return text
+    lowered = text.lower()
+    start = 0
+    for term in query.lower().split():
+        position = lowered.find(term)
+        if position != -1:
+            start = max(position - length // 4, 0)
+            break
+    snippet = text[start : start + length]
+    prefix = "..." if start > 0 else ""
+    suffix = "..." if start + length < len(text) else ""
+    return f"{prefix}{snippet}{suffix}"
+
+
+def _compact_snippets(result: Any, max_tokens: int) -> str:
+    if not isinstance(result, dict) or not isinstance(result.get("results"), list):
+        return _compact_structure(result, max_tokens)
+
+    query = str(result.get("query", ""))
+    entries: List[Any] = result["results"]
+
+    kept: List[Any] = []
+    for length in _SNIPPET_LENGTHS:
+        snippets = [
+            (
+                {
+                    key: (
+                        _snippet(value, query, length)
+                        if isinstance(value, str)
+                        else value
+                    )
+                    for key, value in entry.items()
+                }
+                if isinstance(entry, dict)
+                else entry
+            )
+            for entry in entries
+        ]
+        text = serialize_result({**result, "results": snippets})
+        if fits(text, max_tokens):
+            return text
+        kept = snippets
+
+    # Results are ranked, so drop from the tail until the rest fits
+    while kept:
+        kept = kept[:-1]
+        text = serialize_result(
+            {**result, "results": kept, "omitted_results": len(entries) - len(kept)}
+        )
+        if fits(text, max_tokens):
+            return text
+    return text
+
+
+def _spill(text: str, max_tokens: int, spill_dir: Optional[Path], label: str) -> str:
+    if not spill_dir:
+        return text
+
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()[:12]
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    path = Path(spill_dir) / f"{label}_output_{timestamp}_{digest}.txt"
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+    except OSError as e:
+        print(f"Error spilling {label} output: {e}")
+        return text
+
+    notice = (
+        f"\n... [output truncated, {len(text)} characters total. "
+        f"Full output saved to {path.resolve()}]"
+    )
+    preview_tokens = max(max_tokens - count_tokens(notice) - 20, 0)
+    preview = decode(encode(text[: preview_tokens * 16])[:preview_tokens])
+    return preview + notice
@@ -0,0 +1,211 @@
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional
+
+from app.config import Config
+from app.core.metrics import metrics
+
+# Split cached text into word-sized pieces, roughly what the API streams
+_REPLAY_PIECE = re.compile(r"\s*\S+|\s+")
+
+
+class CompletionCache:
+    """Two-tier cache for deterministic (temperature 0) chat completions.
+
+    Entries are keyed by a hash of the model, messages, tool schemas and
+    tool choice. Hot entries live in an in-memory LRU; everything is also
+    written to ``cache_dir`` as JSON and expires after ``ttl`` seconds.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        cache_dir: Optional[Path] = None,
+        ttl: int = 7 * 24 * 60 * 60,
+        max_entries: int = 256,
+    ):
+        self.enabled = enabled
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(completion_args: Dict[str, Any]) -> str:
+        """Hash the parts of a request that determine a temperature-0 answer"""
+        payload = {
+            "model": completion_args.get("model"),
+            "messages": completion_args.get("messages", []),
+            "tools": completion_args.get("tools", []),
+            "tool_choice": completion_args.get("tool_choice"),
+        }
+        encoded = json.dumps(payload, sort_keys=True, default=str)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def is_cacheable(self, completion_args: Dict[str, Any]) -> bool:
+        """Only deterministic requests are safe to replay"""
+        return self.enabled and completion_args.get("temperature") == 0.0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up an entry, promoting disk hits into the memory tier"""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and not self._expired(entry):
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry
+            self._memory.pop(key, None)
+
+        entry = self._read_disk(key)
+        with self._lock:
+            if entry:
+                self._remember(key, entry)
+                self.hits += 1
+            else:
+                self.misses += 1
+        return entry
+
+    def set(self, key: str, entry: Dict[str, Any]) -> None:
+        """Store an entry in both tiers"""
+        entry = {**entry, "created_at": time.time()}
+        with self._lock:
+            self._remember(key, entry)
+        self._write_disk(key, entry)
+
+    def stream(self, client, completion_args: Dict[str, Any]) -> Iterator[Any]:
+        """Drop-in replacement for ``client.chat.completions.create(stream=True)``
+
+        Cache hits are replayed as synthetic chunks; misses are streamed from
+        the API and recorded once the stream has been fully consumed.
+        """
+        if not self.is_cacheable(completion_args):
+            return client.chat.completions.create(**completion_args)
+
+        key = self.make_key(completion_args)
+        entry = self.get(key)
+        if entry:
+            return self._replay(entry)
+
+        return self._record(key, client.chat.completions.create(**completion_args))
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+            "memory_entries": len(self._memory),
+        }
+
+    def _record(self, key: str, stream) -> Iterator[Any]:
+        content = ""
+        tool_calls: Dict[int, Dict[str, Any]] = {}
+
+        for chunk in stream:
+            if chunk.choices:
+                delta = chunk.choices[0].delta
+                if delta.content:
+                    content += delta.content
+                for tool_call in delta.tool_calls or []:
+                    call = tool_calls.setdefault(
+                        tool_call.index, {"id": "", "name": "", "arguments": ""}
+                    )
+                    if tool_call.id:
+                        call["id"] = tool_call.id
+                    if tool_call.function.name:
+                        call["name"] = tool_call.function.name
+                    if tool_call.function.arguments:
+                        call["arguments"] += tool_call.function.arguments
+            yield chunk
+
+        # Only reached when the caller consumed the whole stream
+        self.set(
+            key,
+            {
+                "content": content,
+                "tool_calls": [
+                    {"index": index, **call} for index, call in tool_calls.items()
+                ],
+            },
+        )
+
+    @staticmethod
+    def _replay(entry: Dict[str, Any]) -> Iterator[Any]:
+        for piece in _REPLAY_PIECE.findall(entry.get("content", "")):
+            yield _chunk(content=piece)
+
+        tool_calls: List[Dict[str, Any]] = entry.get("tool_calls", [])
+        for call in tool_calls:
+            yield _chunk(
+                tool_calls=[
+                    SimpleNamespace(
+                        index=call["index"],
+                        id=call["id"],
+                        function=SimpleNamespace(
+                            name=call["name"], arguments=call["arguments"]
+                        ),
+                    )
+                ]
+            )
+
+    def _remember(self, key: str, entry: Dict[str, Any]) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _expired(self, entry: Dict[str, Any]) -> bool:
+        return time.time() - entry.get("created_at", 0) > self.ttl
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def _read_disk(self, key: str) -> Optional[Dict[str, Any]]:
+        if not self.cache_dir:
+            return None
+        path = self._path(key)
+        try:
+            entry = json.loads(path.read_text())
+        except (OSError, ValueError):
+            return None
+        if self._expired(entry):
+            path.unlink(missing_ok=True)
+            return None
+        return entry
+
+    def _write_disk(self, key: str, entry: Dict[str, Any]) -> None:
+        if not self.cache_dir:
+            return
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = self._path(key).with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(entry))
+            tmp_path.replace(self._path(key))
+        except OSError as e:
+            print(f"Error writing completion cache entry: {e}")
+
+
+def _chunk(content: Optional[str] = None, tool_calls=None) -> SimpleNamespace:
+    """Build an object shaped like an OpenAI streaming chunk"""
+    delta = SimpleNamespace(content=content, tool_calls=tool_calls)
+    return SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+
+# Create a global completion cache
+completion_cache = CompletionCache(
+    enabled=Config.CHAT_CACHE_ENABLED,
+    cache_dir=Config.CHAT_CACHE_DIR,
+    ttl=Config.CHAT_CACHE_TTL,
+    max_entries=Config.CHAT_CACHE_MAX_ENTRIES,
+)
+
+metrics.register("completion_cache", completion_cache.stats)
@@ -0,0 +1,201 @@
+import hashlib
+import re
+import threading
+import time
+import unicodedata
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from app.config import Config
+from app.core.embeddings import embed_texts
+from app.core.metrics import metrics
+from app.models.base import Session
+from app.models.embedding_cache import EmbeddingCacheEntry
+from app.utils.lru import LRUCache, MISSING
+
+# Default output size of each embedding model, used in cache keys when
+# no explicit `dimensions` is requested
+MODEL_DIMENSIONS = {
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+    "text-embedding-ada-002": 1536,
+}
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Remove Unicode and whitespace differences that don't change meaning"""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+def content_hash(text: str) -> str:
+    """sha256 of the normalized text"""
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Content-addressed embedding cache with memory and database tiers
+
+    Vectors are keyed by (model, dimensions, content hash), so unchanged
+    text is never sent to the API twice, whether it comes from an edit, a
+    rename or another record. Entries unused for
+    EMBEDDING_CACHE_MAX_AGE_DAYS are deleted, at most once an hour.
+
+    Memory hits don't reach the database, so their hashes are collected
+    and `last_used_at` is updated for them in one batch, at most once an
+    hour; otherwise entries in constant use would age out of the database.
+    """
+
+    def __init__(self, max_entries: int, max_age_days: int):
+        self.memory = LRUCache(max_entries=max_entries)
+        self.max_age_days = max_age_days
+        self.evict_interval = 60 * 60
+        self._last_evicted = 0.0
+        self.touch_interval = 60 * 60
+        self._last_touched = time.monotonic()
+        self._touched: Dict[Tuple[str, int], Set[str]] = {}
+        self._lock = threading.Lock()
+        self.db_hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+    def embed(
+        self, texts: List[str], model: str, dimensions: Optional[int] = None
+    ) -> List[List[float]]:
+        """Return one vector per text, embedding only uncached content"""
+        dims = dimensions or MODEL_DIMENSIONS.get(model, 0)
+        hashes = [content_hash(text) for text in texts]
+        vectors: Dict[str, List[float]] = {}
+
+        # Memory tier
+        for h in set(hashes):
+            vector = self.memory.get((model, dims, h))
+            if vector is not MISSING:
+                vectors[h] = vector
+        if vectors:
+            with self._lock:
+                self._touched.setdefault((model, dims), set()).update(vectors)
+            self._maybe_touch()
+
+        # Database tier, then the API for whatever is left
+        missing = [h for h in dict.fromkeys(hashes) if h not in vectors]
+        if missing:
+            text_by_hash = dict(zip(hashes, texts))
+            vectors.update(
+                self._load_or_embed(text_by_hash, missing, model, dims, dimensions)
+            )
+
+        return [vectors[h] for h in hashes]
+
+    def _load_or_embed(
+        self,
+        text_by_hash: Dict[str, str],
+        missing: List[str],
+        model: str,
+        dims: int,
+        dimensions: Optional[int],
+    ) -> Dict[str, List[float]]:
+        with Session() as session:
+            try:
+                found = EmbeddingCacheEntry.lookup(session, model, dims, missing)
+                self.db_hits += len(found)
+
+                to_embed = [h for h in missing if h not in found]
+                embedded: Dict[str, List[float]] = {}
+                if to_embed:
+                    self.misses += len(to_embed)
+                    new_vectors = embed_texts(
+                        [text_by_hash[h] for h in to_embed],
+                        model,
+                        dimensions=dimensions,
+                    )
+                    embedded = dict(zip(to_embed, new_vectors))
+                    EmbeddingCacheEntry.store(session, model, dims, embedded)
+
+                self._maybe_evict(session)
+                session.commit()
+            except Exception as e:
+                print(f"Error using embedding cache: {e}")
+                session.rollback()
+                raise
+
+        vectors = {**found, **embedded}
+        for h, vector in vectors.items():
+            self.memory.set((model, dims, h), vector)
+        return vectors
+
+    def _maybe_touch(self) -> None:
+        with self._lock:
+            if time.monotonic() - self._last_touched < self.touch_interval:
+                return
+            self._last_touched = time.monotonic()
+            touched, self._touched = self._touched, {}
+
+        with Session() as session:
+            try:
+                for (model, dims), hashes in touched.items():
+                    EmbeddingCacheEntry.touch(session, model, dims, list(hashes))
+                session.commit()
+            except Exception as e:
+                # Not worth failing the embed for; at worst an entry is
+                # evicted early and embedded again
+                print(f"Error updating embedding cache usage: {e}")
+                session.rollback()
+
+    def _maybe_evict(self, session) -> None:
+        with self._lock:
+            if time.monotonic() - self._last_evicted < self.evict_interval:
+                return
+            self._last_evicted = time.monotonic()
+        cutoff = datetime.utcnow() - timedelta(days=self.max_age_days)
+        self.evicted += EmbeddingCacheEntry.evict_unused(session, cutoff)
+
+    def stats(self) -> Dict[str, Any]:
+        memory_hits = self.memory.hits
+        total = memory_hits + self.db_hits + self.misses
+        return {
+            "memory_hits": memory_hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "hit_ratio": (memory_hits + self.db_hits) / total if total else 0.0,
+            "memory_entries": len(self.memory),
+            "evicted": self.evicted,
+        }
+
+
+class QueryEmbeddingCache:
+    """In-memory cache of search query embeddings
+
+    Queries are short-lived and often repeated, so unlike document chunks
+    they are kept only in memory, with LRU and TTL eviction, and never
+    written to the database.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.cache = LRUCache(max_entries=max_entries, ttl=ttl)
+
+    def embed_query(
+        self, query: str, model: str, dimensions: Optional[int] = None
+    ) -> List[float]:
+        normalized = normalize_text(query)
+        key = (model, dimensions or MODEL_DIMENSIONS.get(model, 0), normalized)
+        vector = self.cache.get(key)
+        if vector is MISSING:
+            vector = embed_texts([normalized], model, dimensions=dimensions)[0]
+            self.cache.set(key, vector)
+        return vector
+
+    def stats(self) -> Dict[str, Any]:
+        return self.cache.stats()
+
+
+embedding_cache = EmbeddingCache(
+    Config.EMBEDDING_CACHE_MAX_ENTRIES, Config.EMBEDDING_CACHE_MAX_AGE_DAYS
+)
+metrics.register("embedding_cache", embedding_cache.stats)
+
+query_embedding_cache = QueryEmbeddingCache(
+    Config.QUERY_EMBEDDING_CACHE_MAX_ENTRIES, Config.QUERY_EMBEDDING_CACHE_TTL
+)
+metrics.register("query_embeddings", query_embedding_cache.stats)
@@ -0,0 +1,181 @@
+import threading
+from datetime import timedelta
+from typing import Any, Dict, List, Optional
+
+from app.config import Config
+from app.core.metrics import metrics
+from app.models.base import Session
+from app.models.embedding_job import EmbeddingJob
+
+
+class EmbeddingWorker:
+    """Runs queued embedding syncs on background threads
+
+    Jobs live in the `embedding_jobs` table and are claimed with
+    `FOR UPDATE SKIP LOCKED`, so several threads (or processes) can drain
+    the queue without running the same job twice. A job left running by a
+    crashed worker is picked up again once its lease expires; failures are
+    retried, `retry_delay` seconds apart, up to EMBEDDING_JOB_MAX_ATTEMPTS
+    times.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        batch_size: int,
+        lease_seconds: float,
+        max_attempts: int,
+        retry_delay: float = 30,
+        poll_interval: float = 1.0,
+    ):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.lease = timedelta(seconds=lease_seconds)
+        self.max_attempts = max_attempts
+        self.retry_delay = timedelta(seconds=retry_delay)
+        self.poll_interval = poll_interval
+        self._threads: List[threading.Thread] = []
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self.done = 0
+        self.retried = 0
+        self.failed = 0
+
+    def start(self) -> None:
+        """Start the worker threads, picking up anything already queued"""
+        self._ensure_workers()
+        self._wakeup.set()
+
+    def wake(self) -> None:
+        """Tell idle workers a job was enqueued"""
+        self.start()
+
+    def run_once(self) -> int:
+        """Claim and run one batch of jobs, returning how many ran"""
+        with Session() as session:
+            try:
+                jobs = EmbeddingJob.claim(
+                    session, self.batch_size, self.lease, self.retry_delay
+                )
+                session.commit()
+            except Exception as e:
+                print(f"Error claiming embedding jobs: {e}")
+                session.rollback()
+                raise
+
+        # Jobs for the same model and field are synced together
+        groups: Dict[tuple, List[Dict[str, Any]]] = {}
+        for job in jobs:
+            key = (job["vectorizable_type"], job["field_name"])
+            groups.setdefault(key, []).append(job)
+
+        for group in groups.values():
+            if len(group) > 1 and self._run_group(group):
+                results = [(job, "done", None) for job in group]
+                self.done += len(group)
+            else:
+                # Run one by one so a single bad record fails alone
+                results = [(job, *self._run_job(job)) for job in group]
+            for job, status, error in results:
+                self._finish(job, status, error)
+        return len(jobs)
+
+    def _run_group(self, jobs: List[Dict[str, Any]]) -> bool:
+        model = self._model_class(jobs[0]["vectorizable_type"])
+        if model is None:
+            return False
+
+        with Session() as session:
+            try:
+                ids = [job["vectorizable_id"] for job in jobs]
+                records = session.query(model).filter(model.id.in_(ids)).all()
+                model.sync_embeddings(session, records, jobs[0]["field_name"] or None)
+                return True
+            except Exception as e:
+                print(f"Error syncing {len(jobs)} {model.__name__} embeddings: {e}")
+                session.rollback()
+                return False
+
+    @staticmethod
+    def _finish(job: Dict[str, Any], status: str, error: Optional[str]) -> None:
+        with Session() as session:
+            try:
+                EmbeddingJob.finish(session, job, status, error)
+                session.commit()
+            except Exception as e:
+                print(f"Error finishing embedding job {job['id']}: {e}")
+                session.rollback()
+
+    def _run_job(self, job: Dict[str, Any]):
+        model = self._model_class(job["vectorizable_type"])
+        if model is None:
+            self.failed += 1
+            return "failed", f"Unknown vectorizable type {job['vectorizable_type']}"
+
+        with Session() as session:
+            try:
+                record = session.get(model, job["vectorizable_id"])
+                # A record deleted since it was queued has nothing to sync
+                if record is not None:
+                    model.sync_embeddings(session, [record], job["field_name"] or None)
+            except Exception as e:
+                print(
+                    f"Error syncing embeddings for {job['vectorizable_type']} "
+                    f"{job['vectorizable_id']}: {e}"
+                )
+                session.rollback()
+                if job["attempts"] >= self.max_attempts:
+                    self.failed += 1
+                    return "failed", str(e)
+                self.retried += 1
+                return "pending", str(e)
+
+        self.done += 1
+        return "done", None
+
+    @staticmethod
+    def _model_class(type_name: str) -> Optional[type]:
+        # Imported here: the vectorizable concern enqueues through this module
+        from app.models.concerns.vectorizable import VectorizableRegistry
+
+        for model in VectorizableRegistry.get_models():
+            if model.__name__ == type_name:
+                return model
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": sum(t.is_alive() for t in self._threads),
+            "done": self.done,
+            "retried": self.retried,
+            "failed": self.failed,
+        }
+
+    def _ensure_workers(self) -> None:
+        with self._lock:
+            self._threads = [t for t in self._threads if t.is_alive()]
+            for i in range(len(self._threads), self.workers):
+                thread = threading.Thread(
+                    target=self._run, name=f"embedding-worker-{i}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def _run(self) -> None:
+        while True:
+            try:
+                if self.run_once():
+                    continue
+            except Exception as e:
+                print(f"Error in embedding worker: {e}")
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+
+embedding_worker = EmbeddingWorker(
+    Config.EMBEDDING_WORKERS,
+    Config.EMBEDDING_JOB_BATCH_SIZE,
+    Config.EMBEDDING_JOB_LEASE_SECONDS,
+    Config.EMBEDDING_JOB_MAX_ATTEMPTS,
+)
+metrics.register("embedding_worker", embedding_worker.stats)
@@ -0,0 +1,89 @@
+from typing import Any, Dict, Iterator, List, Optional
+
+from app.config import Config
+from app.core.metrics import metrics
+from app.core.openai_client import get_openai_client
+from app.utils.tokenizer import count_tokens
+
+
+class EmbeddingStats:
+    def __init__(self):
+        self.requests = 0
+        self.inputs = 0
+        self.tokens = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "inputs": self.inputs,
+            "tokens": self.tokens,
+            "inputs_per_request": (
+                self.inputs / self.requests if self.requests else 0.0
+            ),
+        }
+
+
+embedding_stats = EmbeddingStats()
+
+
+def batch_indices(
+    token_counts: List[int], max_inputs: int, max_tokens: int
+) -> Iterator[List[int]]:
+    """Group input positions into batches under both request limits
+
+    An input larger than `max_tokens` on its own still gets a batch of its
+    own, so the API reports the error rather than the input being dropped.
+    """
+    batch: List[int] = []
+    batch_tokens = 0
+    for i, tokens in enumerate(token_counts):
+        if batch and (len(batch) >= max_inputs or batch_tokens + tokens > max_tokens):
+            yield batch
+            batch, batch_tokens = [], 0
+        batch.append(i)
+        batch_tokens += tokens
+    if batch:
+        yield batch
+
+
+def embed_texts(
+    texts: List[str],
+    model: str,
+    *,
+    dimensions: Optional[int] = None,
+    max_inputs: Optional[int] = None,
+    max_tokens: Optional[int] = None,
+) -> List[List[float]]:
+    """Embed many texts in as few requests as the API limits allow
+
+    Results are mapped back by the index the API returns, so the output
+    lines up with `texts` regardless of response ordering.
+    """
+    max_inputs = max_inputs or Config.EMBEDDING_BATCH_SIZE
+    max_tokens = max_tokens or Config.EMBEDDING_BATCH_MAX_TOKENS
+
+    client = get_openai_client()
+    token_counts = [count_tokens(text) for text in texts]
+    vectors: List[Optional[List[float]]] = [None] * len(texts)
+
+    # Only text-embedding-3 models accept `dimensions`
+    extra = {"dimensions": dimensions} if dimensions else {}
+
+    for batch in batch_indices(token_counts, max_inputs, max_tokens):
+        response = client.embeddings.create(
+            input=[texts[i] for i in batch],
+            model=model,
+            encoding_format="float",
+            **extra,
+        )
+        for item in response.data:
+            vectors[batch[item.index]] = item.embedding
+
+        embedding_stats.requests += 1
+        embedding_stats.inputs += len(batch)
+        embedding_stats.tokens += sum(token_counts[i] for i in batch)
+
+    return vectors
+
+
+metrics.register("embeddings", embedding_stats.stats)
@@ -0,0 +1,377 @@
+import bisect
+import difflib
+import mmap
+import os
+import re
+import struct
+import threading
+import unicodedata
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.config import Config
+from app.core.metrics import metrics
+
+# Index layout (little endian):
+#   header  magic, record count, key count, records/keys/strings offsets
+#   records latitude, longitude, population, strings offset and length of
+#           "name\x1fcountry_code\x1fadmin1\x1fadmin1_code\x1ftimezone"
+#   keys    strings offset and length of a normalized name, record index;
+#           sorted by name, then by descending population
+#   strings UTF-8 blob shared by records and keys
+MAGIC = b"GZI2"
+HEADER = struct.Struct("<4sIIIII")
+RECORD = struct.Struct("<ffIIH")
+KEY = struct.Struct("<IHI")
+FIELD_SEPARATOR = "\x1f"
+
+# Column positions in the GeoNames cities*.txt format
+_NAME, _ASCII_NAME, _ALTERNATE_NAMES = 1, 2, 3
+_LATITUDE, _LONGITUDE = 4, 5
+_COUNTRY_CODE, _ADMIN1 = 8, 10
+_POPULATION, _TIMEZONE = 14, 17
+
+# Column positions in the GeoNames admin1CodesASCII.txt format
+_ADMIN1_KEY, _ADMIN1_NAME = 0, 1
+
+# Fuzzy matching only scans names that share this many leading characters
+FUZZY_PREFIX_CHARS = 2
+FUZZY_MAX_CANDIDATES = 5000
+FUZZY_CUTOFF = 0.8
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize(name: str) -> str:
+    """Casefold, strip accents and punctuation, and collapse whitespace"""
+    decomposed = unicodedata.normalize("NFKD", name)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    cleaned = _PUNCTUATION.sub(" ", stripped.casefold())
+    return _WHITESPACE.sub(" ", cleaned).strip()
+
+
+def _read_gazetteer(path: Path) -> Iterator[List[str]]:
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip() or line.startswith("#"):
+                continue
+            columns = line.rstrip("\n").split("\t")
+            if len(columns) > _TIMEZONE:
+                yield columns
+
+
+def _read_admin1_names(path: Optional[Path]) -> Dict[str, str]:
+    """Map "CC.code" admin1 keys to their full names"""
+    names: Dict[str, str] = {}
+    if path is None or not path.exists():
+        return names
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip() or line.startswith("#"):
+                continue
+            columns = line.rstrip("\n").split("\t")
+            if len(columns) > _ADMIN1_NAME:
+                names[columns[_ADMIN1_KEY]] = columns[_ADMIN1_NAME]
+    return names
+
+
+def build_index(
+    source: Path, index_path: Path, admin1_path: Optional[Path] = None
+) -> int:
+    """Compile a GeoNames style gazetteer into the binary lookup index
+
+    Admin1 codes are resolved to full names from `admin1_path`, so results
+    read like open-meteo's ("Illinois" rather than "IL"). Returns the
+    number of places written. The index is written to a temporary file
+    and renamed so readers never see a partial file.
+    """
+    admin1_names = _read_admin1_names(admin1_path)
+    strings = bytearray()
+    offsets: Dict[bytes, int] = {}
+
+    def intern(text: str) -> Tuple[int, int]:
+        data = text.encode("utf-8")
+        if data not in offsets:
+            offsets[data] = len(strings)
+            strings.extend(data)
+        return offsets[data], len(data)
+
+    records = bytearray()
+    keys: List[Tuple[bytes, int, int]] = []
+    count = 0
+    for columns in _read_gazetteer(source):
+        population = int(columns[_POPULATION] or 0)
+        admin1_code = columns[_ADMIN1]
+        admin1_key = f"{columns[_COUNTRY_CODE]}.{admin1_code}"
+        fields = FIELD_SEPARATOR.join(
+            [
+                columns[_NAME],
+                columns[_COUNTRY_CODE],
+                admin1_names.get(admin1_key, admin1_code),
+                admin1_code,
+                columns[_TIMEZONE],
+            ]
+        )
+        records.extend(
+            RECORD.pack(
+                float(columns[_LATITUDE]),
+                float(columns[_LONGITUDE]),
+                population,
+                *intern(fields),
+            )
+        )
+
+        names = [columns[_NAME], columns[_ASCII_NAME]]
+        names += columns[_ALTERNATE_NAMES].split(",")
+        for key in {normalize(name) for name in names if name.strip()}:
+            keys.append((key.encode("utf-8"), -population, count))
+        count += 1
+
+    keys.sort()
+    key_table = bytearray()
+    for key, _, record in keys:
+        key_table.extend(KEY.pack(*intern(key.decode("utf-8")), record))
+
+    records_offset = HEADER.size
+    keys_offset = records_offset + len(records)
+    strings_offset = keys_offset + len(key_table)
+
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = index_path.with_suffix(".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(
+            HEADER.pack(
+                MAGIC, count, len(keys), records_offset, keys_offset, strings_offset
+            )
+        )
+        f.write(records)
+        f.write(key_table)
+        f.write(strings)
+    os.replace(tmp_path, index_path)
+    return count
+
+
+class _Keys:
+    """Sequence view over the sorted key table, for use with bisect"""
+
+    def __init__(self, gazetteer: "Gazetteer"):
+        self._gazetteer = gazetteer
+
+    def __len__(self) -> int:
+        return self._gazetteer.key_count
+
+    def __getitem__(self, i: int) -> bytes:
+        return self._gazetteer._key(i)[0]
+
+
+class Gazetteer:
+    """Memory-mapped city index with exact and fuzzy lookup"""
+
+    def __init__(self, index_path: Path):
+        with open(index_path, "rb") as f:
+            self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (
+            magic,
+            self.record_count,
+            self.key_count,
+            self._records_offset,
+            self._keys_offset,
+            self._strings_offset,
+        ) = HEADER.unpack_from(self._buffer)
+        if magic != MAGIC:
+            self._buffer.close()
+            raise ValueError(f"{index_path} is not a gazetteer index")
+        self._keys = _Keys(self)
+
+    def _string(self, offset: int, length: int) -> bytes:
+        start = self._strings_offset + offset
+        return self._buffer[start : start + length]
+
+    def _key(self, i: int) -> Tuple[bytes, int]:
+        offset, length, record = KEY.unpack_from(
+            self._buffer, self._keys_offset + i * KEY.size
+        )
+        return self._string(offset, length), record
+
+    def _record(self, i: int) -> Dict[str, Any]:
+        latitude, longitude, population, offset, length = RECORD.unpack_from(
+            self._buffer, self._records_offset + i * RECORD.size
+        )
+        fields = self._string(offset, length).decode("utf-8")
+        name, country_code, admin1, admin1_code, timezone = fields.split(
+            FIELD_SEPARATOR
+        )
+        return {
+            "name": name,
+            "latitude": round(latitude, 4),
+            "longitude": round(longitude, 4),
+            "country_code": country_code,
+            "admin1": admin1,
+            "admin1_code": admin1_code,
+            "timezone": timezone,
+            "population": population,
+        }
+
+    def _scan(self, prefix: bytes, limit: int) -> Iterator[Tuple[bytes, int]]:
+        """Yield (key, record) pairs whose key starts with `prefix`"""
+        i = bisect.bisect_left(self._keys, prefix)
+        end = min(i + limit, self.key_count)
+        while i < end:
+            key, record = self._key(i)
+            if not key.startswith(prefix):
+                return
+            yield key, record
+            i += 1
+
+    def exact(self, name: str, count: int = 10) -> List[Dict[str, Any]]:
+        """Places whose name or an alternate name matches exactly"""
+        key = normalize(name).encode("utf-8")
+        records = []
+        for candidate, record in self._scan(key, self.key_count):
+            if candidate != key:
+                break
+            records.append(record)
+        return self._unique(records)[:count]
+
+    def fuzzy(self, name: str, count: int = 10) -> List[Dict[str, Any]]:
+        """Closest spellings among names sharing the first few characters"""
+        key = normalize(name)
+        if len(key) <= FUZZY_PREFIX_CHARS:
+            return []
+        prefix = key[:FUZZY_PREFIX_CHARS].encode("utf-8")
+        matcher = difflib.SequenceMatcher(b=key, autojunk=False)
+        scored = []
+        for candidate, record in self._scan(prefix, FUZZY_MAX_CANDIDATES):
+            matcher.set_seq1(candidate.decode("utf-8"))
+            if matcher.real_quick_ratio() < FUZZY_CUTOFF:
+                continue
+            if matcher.quick_ratio() < FUZZY_CUTOFF:
+                continue
+            ratio = matcher.ratio()
+            if ratio >= FUZZY_CUTOFF:
+                scored.append((ratio, record))
+        scored.sort(key=lambda item: -item[0])
+        return self._unique(record for _, record in scored)[:count]
+
+    def search(
+        self, query: str, count: int = 10, fuzzy: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Look up "City" or "City, Region, Country" style queries
+
+        Qualifiers after the first comma narrow the results to places whose
+        country code, admin1 code or admin1 name matches. Only exact names
+        are matched unless `fuzzy`, in which case close spellings are tried
+        when there is no exact match.
+        """
+        name, *qualifiers = query.split(",")
+        if not normalize(name):
+            return []
+        qualifiers = [normalize(q) for q in qualifiers if q.strip()]
+        lookups = (self.exact, self.fuzzy) if fuzzy else (self.exact,)
+        for lookup in lookups:
+            places = lookup(name, count if not qualifiers else self.record_count)
+            if qualifiers:
+                places = [p for p in places if self._matches(p, qualifiers)]
+            if places:
+                return places[:count]
+        return []
+
+    def _unique(self, records: Iterable[int]) -> List[Dict[str, Any]]:
+        seen = set()
+        places = []
+        for record in records:
+            if record not in seen:
+                seen.add(record)
+                places.append(self._record(record))
+        return places
+
+    @staticmethod
+    def _matches(place: Dict[str, Any], qualifiers: List[str]) -> bool:
+        codes = {
+            normalize(place["country_code"]),
+            normalize(place["admin1"]),
+            normalize(place["admin1_code"]),
+        }
+        return all(q in codes for q in qualifiers)
+
+    def close(self) -> None:
+        self._buffer.close()
+
+
+class GazetteerStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
+
+
+gazetteer_stats = GazetteerStats()
+
+_gazetteer: Optional[Gazetteer] = None
+_missing_warned = False
+_lock = threading.Lock()
+
+
+def get_gazetteer() -> Optional[Gazetteer]:
+    """Open the shared index, rebuilding it if the gazetteer or admin1
+    file is newer or the index was written by an older version
+
+    Returns None when no gazetteer file is available, in which case
+    callers should go straight to the network.
+    """
+    global _gazetteer, _missing_warned
+    if _gazetteer is not None:
+        return _gazetteer
+
+    with _lock:
+        if _gazetteer is None:
+            source = Config.GAZETTEER_PATH
+            admin1_path = Config.GAZETTEER_ADMIN1_PATH
+            index_path = Config.GAZETTEER_INDEX_PATH
+            if not source.exists():
+                if not _missing_warned:
+                    print(f"Gazetteer file not found at {source}")
+                    _missing_warned = True
+                return None
+            inputs = [path for path in (source, admin1_path) if path.exists()]
+            if not index_path.exists() or index_path.stat().st_mtime < max(
+                path.stat().st_mtime for path in inputs
+            ):
+                _build(source, index_path, admin1_path)
+            try:
+                _gazetteer = Gazetteer(index_path)
+            except ValueError:
+                _build(source, index_path, admin1_path)
+                _gazetteer = Gazetteer(index_path)
+    return _gazetteer
+
+
+def _build(source: Path, index_path: Path, admin1_path: Path) -> None:
+    count = build_index(source, index_path, admin1_path)
+    print(f"Built gazetteer index with {count} places")
+
+
+def lookup(query: str, count: int = 10, fuzzy: bool = False) -> List[Dict[str, Any]]:
+    """Search the local gazetteer, returning [] on a miss or if unavailable
+
+    Blocking: it may build the index on first use, so async callers should
+    run it in a thread.
+    """
+    gazetteer = get_gazetteer()
+    places = gazetteer.search(query, count, fuzzy) if gazetteer else []
+    if places:
+        gazetteer_stats.hits += 1
+    else:
+        gazetteer_stats.misses += 1
+    return places
+
+
+metrics.register("gazetteer", gazetteer_stats.stats)
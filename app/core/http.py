@@ -0,0 +1,100 @@
+import asyncio
+import random
+import threading
+import weakref
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+
+from app.config import Config
+from app.core.metrics import metrics
+
+# Retry on throttling and transient upstream failures
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class HttpStats:
+    def __init__(self):
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "failures": self.failures,
+        }
+
+
+http_stats = HttpStats()
+
+# Async connections and semaphores are bound to the loop that created them
+_LoopState = Tuple[httpx.AsyncClient, asyncio.Semaphore]
+_loop_state: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopState]" = (
+    weakref.WeakKeyDictionary()
+)
+_lock = threading.Lock()
+
+
+def _state_for_loop() -> _LoopState:
+    loop = asyncio.get_running_loop()
+    with _lock:
+        state = _loop_state.get(loop)
+        if state is None:
+            client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=Config.TOOL_HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=Config.TOOL_HTTP_MAX_CONNECTIONS,
+                    keepalive_expiry=30.0,
+                ),
+                timeout=httpx.Timeout(Config.TOOL_HTTP_TIMEOUT, connect=5.0),
+                follow_redirects=True,
+            )
+            state = (client, asyncio.Semaphore(Config.TOOL_HTTP_MAX_CONCURRENCY))
+            _loop_state[loop] = state
+    return state
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the pooled AsyncClient shared by tools on the running loop"""
+    return _state_for_loop()[0]
+
+
+async def fetch_json(
+    url: str,
+    params: Optional[Dict[str, Any]] = None,
+    *,
+    retries: Optional[int] = None,
+    backoff: float = 0.5,
+) -> Any:
+    """GET `url` and decode the JSON body
+
+    Transport errors and retryable status codes are retried with
+    exponential backoff and full jitter. The number of requests in flight
+    across all tools is capped by TOOL_HTTP_MAX_CONCURRENCY.
+    """
+    client, semaphore = _state_for_loop()
+    retries = Config.TOOL_HTTP_RETRIES if retries is None else retries
+
+    for attempt in range(retries + 1):
+        try:
+            async with semaphore:
+                http_stats.requests += 1
+                response = await client.get(url, params=params)
+        except httpx.TransportError:
+            if attempt >= retries:
+                http_stats.failures += 1
+                raise
+        else:
+            if response.status_code not in RETRY_STATUS_CODES or attempt >= retries:
+                if response.is_error:
+                    http_stats.failures += 1
+                response.raise_for_status()
+                return response.json()
+
+        http_stats.retries += 1
+        await asyncio.sleep(random.uniform(0, backoff * 2**attempt))
+
+
+metrics.register("tool_http", http_stats.stats)
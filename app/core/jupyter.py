@@ -1,5 +1,27 @@
-import jupyter_client
+import asyncio
+import queue
 import re
+import uuid
+from pathlib import Path
+from typing import AsyncIterator, List, Tuple
+
+import jupyter_client
+
+from app.config import Config
+from app.core.kernel_output import OutputSink
+from app.core.kernel_pool import kernel_pool
+from app.core.kernel_supervisor import kernel_supervisor
+
+# How long a cancelled execution may take to stop after an interrupt
+INTERRUPT_DRAIN_TIMEOUT = 10.0
+
+# Rich output types kept from execute_result and display_data messages
+_RICH_OUTPUTS = {
+    "text/plain": "text",
+    "text/html": "html",
+    "image/png": "png",
+    "image/jpeg": "jpeg",
+}
 
 
 def delete_color_control_char(string):
@@ -7,97 +29,222 @@ def delete_color_control_char(string):
     return ansi_escape.sub("", string)
 
 
+def _is_idle(iopub_msg) -> bool:
+    return (
+        iopub_msg["msg_type"] == "status"
+        and iopub_msg["content"].get("execution_state") == "idle"
+    )
+
+
+def _parse_output(iopub_msg) -> List[Tuple[str, str]]:
+    """Turn one iopub message into (mark, content) output pairs"""
+    msg_type = iopub_msg["msg_type"]
+    content = iopub_msg["content"]
+    if msg_type == "stream":
+        if content.get("name") == "stdout":
+            return [("stdout", content["text"])]
+    elif msg_type in ("execute_result", "display_data"):
+        prefix = "execute_result" if msg_type == "execute_result" else "display"
+        data = content.get("data", {})
+        return [
+            (f"{prefix}_{suffix}", data[mime])
+            for mime, suffix in _RICH_OUTPUTS.items()
+            if mime in data
+        ]
+    elif msg_type == "error":
+        if "traceback" in content:
+            return [("error", "\n".join(content["traceback"]))]
+    return []
+
+
+def _text_for_model(content_to_display) -> str:
+    text_to_gpt = []
+    for mark, out_str in content_to_display:
+        if mark in ("stdout", "execute_result_text", "display_text"):
+            text_to_gpt.append(out_str)
+        elif mark in (
+            "execute_result_png",
+            "execute_result_jpeg",
+            "display_png",
+            "display_jpeg",
+        ):
+            text_to_gpt.append(f"[image saved to {out_str}]")
+        elif mark in ("execute_result_html", "display_html"):
+            text_to_gpt.append(f"[html saved to {out_str}]")
+        elif mark == "error":
+            text_to_gpt.append(delete_color_control_char(out_str))
+    return "\n".join(text_to_gpt)
+
+
 class JupyterKernel:
-    def __init__(self, work_dir):
-        self.kernel_manager, self.kernel_client = (
-            jupyter_client.manager.start_new_kernel(kernel_name="python3")
-        )
-        self.work_dir = work_dir
+    def __init__(self, work_dir, owner=None):
+        # Absolute, so paths of saved outputs are valid both here and
+        # inside the kernel, which has chdir'd into work_dir
+        self.work_dir = str(Path(work_dir).resolve())
+        self.owner = owner or str(work_dir)
         self.interrupt_signal = False
-        self._create_work_dir()
+        self._async_client = None
+        self._async_lock = None
+        self._async_loop = None
+        self._drain_tasks = set()
+        self.closed = True
+        self._ensure_running()
         self.available_functions = {
             "execute_code": self.execute_code,
             "python": self.execute_code,
         }
 
     def execute_code_(self, code):
+        with kernel_supervisor.in_use(self):
+            self._ensure_running()
+            return self._execute_sync(code)
+
+    def _execute_sync(self, code):
         msg_id = self.kernel_client.execute(code)
 
         # Get the output of the code
-        msg_list = []
+        sink = self._output_sink()
+        try:
+            self._collect_sync(msg_id, sink)
+        finally:
+            sink.close()
+        return sink.entries
+
+    def _collect_sync(self, msg_id, sink):
         while True:
             try:
                 iopub_msg = self.kernel_client.get_iopub_msg(timeout=1)
-                msg_list.append(iopub_msg)
-                if (
-                    iopub_msg["msg_type"] == "status"
-                    and iopub_msg["content"].get("execution_state") == "idle"
-                ):
-                    break
-            except:
+            except queue.Empty:
                 if self.interrupt_signal:
                     self.kernel_manager.interrupt_kernel()
                     self.interrupt_signal = False
                 continue
 
-        all_output = []
-        for iopub_msg in msg_list:
-            if iopub_msg["msg_type"] == "stream":
-                if iopub_msg["content"].get("name") == "stdout":
-                    output = iopub_msg["content"]["text"]
-                    all_output.append(("stdout", output))
-            elif iopub_msg["msg_type"] == "execute_result":
-                if "data" in iopub_msg["content"]:
-                    if "text/plain" in iopub_msg["content"]["data"]:
-                        output = iopub_msg["content"]["data"]["text/plain"]
-                        all_output.append(("execute_result_text", output))
-                    if "text/html" in iopub_msg["content"]["data"]:
-                        output = iopub_msg["content"]["data"]["text/html"]
-                        all_output.append(("execute_result_html", output))
-                    if "image/png" in iopub_msg["content"]["data"]:
-                        output = iopub_msg["content"]["data"]["image/png"]
-                        all_output.append(("execute_result_png", output))
-                    if "image/jpeg" in iopub_msg["content"]["data"]:
-                        output = iopub_msg["content"]["data"]["image/jpeg"]
-                        all_output.append(("execute_result_jpeg", output))
-            elif iopub_msg["msg_type"] == "display_data":
-                if "data" in iopub_msg["content"]:
-                    if "text/plain" in iopub_msg["content"]["data"]:
-                        output = iopub_msg["content"]["data"]["text/plain"]
-                        all_output.append(("display_text", output))
-                    if "text/html" in iopub_msg["content"]["data"]:
-                        output = iopub_msg["content"]["data"]["text/html"]
-                        all_output.append(("display_html", output))
-                    if "image/png" in iopub_msg["content"]["data"]:
-                        output = iopub_msg["content"]["data"]["image/png"]
-                        all_output.append(("display_png", output))
-                    if "image/jpeg" in iopub_msg["content"]["data"]:
-                        output = iopub_msg["content"]["data"]["image/jpeg"]
-                        all_output.append(("display_jpeg", output))
-            elif iopub_msg["msg_type"] == "error":
-                if "traceback" in iopub_msg["content"]:
-                    output = "\n".join(iopub_msg["content"]["traceback"])
-                    all_output.append(("error", output))
-
-        return all_output
+            # Skip output from other executions, e.g. the async client's
+            if iopub_msg["parent_header"].get("msg_id") != msg_id:
+                continue
+            if _is_idle(iopub_msg):
+                break
+            for output in _parse_output(iopub_msg):
+                sink.add(*output)
 
     def execute_code(self, code):
-        text_to_gpt = []
         content_to_display = self.execute_code_(code)
-        for mark, out_str in content_to_display:
-            if mark in ("stdout", "execute_result_text", "display_text"):
-                text_to_gpt.append(out_str)
-            elif mark in (
-                "execute_result_png",
-                "execute_result_jpeg",
-                "display_png",
-                "display_jpeg",
-            ):
-                text_to_gpt.append("[image]")
-            elif mark == "error":
-                text_to_gpt.append(delete_color_control_char(out_str))
-
-        return "\n".join(text_to_gpt), content_to_display
+        return _text_for_model(content_to_display), content_to_display
+
+    async def stream_code(self, code) -> AsyncIterator[Tuple[str, str]]:
+        """Execute `code` and yield (mark, content) pairs as they arrive
+
+        Only one execution runs at a time per kernel. If the consumer is
+        cancelled or stops iterating early, the kernel is interrupted so
+        the code doesn't keep running unobserved.
+        """
+        with kernel_supervisor.in_use(self):
+            if self.closed:
+                await asyncio.to_thread(self._ensure_running)
+            async for output in self._stream_async(code):
+                yield output
+
+    async def _stream_async(self, code) -> AsyncIterator[Tuple[str, str]]:
+        client, lock = await self._async_state()
+        await lock.acquire()
+        msg_id = None
+        finished = False
+        try:
+            msg_id = client.execute(code)
+            while True:
+                iopub_msg = await client.get_iopub_msg()
+                if iopub_msg["parent_header"].get("msg_id") != msg_id:
+                    continue
+                if _is_idle(iopub_msg):
+                    finished = True
+                    return
+                for output in _parse_output(iopub_msg):
+                    yield output
+        finally:
+            if finished or msg_id is None:
+                lock.release()
+            else:
+                self._interrupt_and_drain(client, msg_id, lock)
+
+    async def execute_code_async(self, code, on_output=None):
+        """Async counterpart of `execute_code` that never blocks the loop
+
+        `on_output` is called with each (mark, content) pair as it arrives.
+        """
+        sink = self._output_sink()
+        try:
+            async for output in self.stream_code(code):
+                sink.add(*output)
+                if on_output:
+                    on_output(*output)
+        finally:
+            sink.close()
+        return _text_for_model(sink.entries), sink.entries
+
+    def _output_sink(self):
+        """Sink for one execution's outputs under the session's work dir"""
+        return OutputSink(Path(self.work_dir) / "outputs", uuid.uuid4().hex[:8])
+
+    async def _async_state(self):
+        """Return the async client and execution lock for the running loop
+
+        zmq.asyncio sockets are tied to the loop they are used from, so a
+        new client is connected if the kernel is used from another loop.
+        A new client waits for the kernel to answer before it is used:
+        iopub is a PUB socket, and output sent before the subscription is
+        in place (including the idle status) would be lost.
+        """
+        loop = asyncio.get_running_loop()
+        if self._async_loop is not loop:
+            self._close_async_client()
+            client = jupyter_client.AsyncKernelClient(
+                **self.kernel_manager.get_connection_info(session=True)
+            )
+            client.start_channels()
+            try:
+                await client.wait_for_ready(timeout=Config.KERNEL_STARTUP_TIMEOUT)
+            except Exception:
+                client.stop_channels()
+                raise
+            self._async_client = client
+            self._async_lock = asyncio.Lock()
+            self._async_loop = loop
+        return self._async_client, self._async_lock
+
+    def _interrupt_and_drain(self, client, msg_id, lock):
+        """Interrupt a cancelled execution and drain it in the background
+
+        The cancelled caller returns right away, so tool timeouts are not
+        stretched by the drain; the execution lock is held until the
+        interrupted code's output is consumed, so the next execution
+        doesn't read it.
+        """
+        try:
+            self.kernel_manager.interrupt_kernel()
+        except Exception as e:
+            print(f"Error interrupting kernel: {e}")
+        task = asyncio.get_running_loop().create_task(
+            self._drain(client, msg_id, lock)
+        )
+        self._drain_tasks.add(task)
+        task.add_done_callback(self._drain_tasks.discard)
+
+    @staticmethod
+    async def _drain(client, msg_id, lock):
+        async def wait_for_idle():
+            while True:
+                iopub_msg = await client.get_iopub_msg()
+                is_parent = iopub_msg["parent_header"].get("msg_id") == msg_id
+                if is_parent and _is_idle(iopub_msg):
+                    return
+
+        try:
+            await asyncio.wait_for(wait_for_idle(), INTERRUPT_DRAIN_TIMEOUT)
+        except Exception as e:
+            print(f"Error draining interrupted execution: {e}")
+        finally:
+            lock.release()
 
     def _create_work_dir(self):
         # set work dir in jupyter environment
@@ -108,15 +255,46 @@ class JupyterKernel:
             f"os.chdir('{self.work_dir}')\n"
             f"del os"
         )
-        self.execute_code_(init_code)
+        self._execute_sync(init_code)
 
     def send_interrupt_signal(self):
         self.interrupt_signal = True
 
     def restart_jupyter_kernel(self):
-        self.kernel_client.shutdown()
-        self.kernel_manager, self.kernel_client = (
-            jupyter_client.manager.start_new_kernel(kernel_name="python3")
-        )
+        self.shutdown()
         self.interrupt_signal = False
+        self._ensure_running()
+
+    def shutdown(self):
+        if self.closed:
+            return
+        self.closed = True
+        kernel_supervisor.unregister(self)
+        self._close_async_client()
+        kernel_pool.release((self.kernel_manager, self.kernel_client))
+
+    def _ensure_running(self):
+        """Start (or, after being reaped, restart) the underlying kernel"""
+        if not self.closed:
+            return
+        kernel_supervisor.make_room()
+        self.kernel_manager, self.kernel_client = kernel_pool.acquire()
+        self.closed = False
+        kernel_supervisor.register(self, self.owner)
         self._create_work_dir()
+
+    def _close_async_client(self):
+        client, loop = self._async_client, self._async_loop
+        self._async_client = self._async_lock = self._async_loop = None
+        if client is None:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        # zmq.asyncio sockets must be closed from their own loop, e.g. when
+        # the supervisor's reaper thread shuts the kernel down
+        if loop is not None and loop is not running and not loop.is_closed():
+            loop.call_soon_threadsafe(client.stop_channels)
+        else:
+            client.stop_channels()
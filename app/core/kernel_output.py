@@ -0,0 +1,107 @@
+import base64
+import binascii
+from pathlib import Path
+from typing import IO, List, Optional, Tuple
+
+from app.config import Config
+from app.utils.tokenizer import count_tokens
+
+# File extension for outputs that are always written to disk
+_FILE_OUTPUTS = {"png": "png", "jpeg": "jpg", "html": "html"}
+
+# Text outputs that count against the in-memory preview
+_TEXT_MARKS = ("stdout", "execute_result_text", "display_text", "error")
+
+
+class OutputSink:
+    """Collects one execution's outputs without holding large payloads
+
+    Images and HTML are written to files in `directory` as they arrive and
+    recorded as (mark, path) entries. Text is kept in memory up to
+    `preview_tokens`; past that, all of the execution's text (including
+    what was already seen) goes to a log file and a reference to it is
+    appended when the sink is closed. Errors are always kept, so a cell
+    that prints a lot and then raises still reports the traceback.
+
+    The sink is the only place kernel output is spilled: the default
+    preview leaves room under the python tool's result budget for a
+    traceback and the log reference.
+    """
+
+    def __init__(self, directory: Path, prefix: str, preview_tokens: int = None):
+        self.directory = Path(directory)
+        self.prefix = prefix
+        self.preview_tokens = (
+            Config.KERNEL_OUTPUT_PREVIEW_TOKENS
+            if preview_tokens is None
+            else preview_tokens
+        )
+        self.entries: List[Tuple[str, str]] = []
+        self._preview_used = 0
+        self._file_count = 0
+        self._text_log: Optional[IO[str]] = None
+        self._text_log_path: Optional[Path] = None
+
+    def add(self, mark: str, content: str) -> Optional[Tuple[str, str]]:
+        """Record an output, returning the entry kept for it (if any)"""
+        suffix = mark.rsplit("_", 1)[-1]
+        if suffix in _FILE_OUTPUTS:
+            entry = (mark, str(self._write_file(suffix, content)))
+            self.entries.append(entry)
+            return entry
+
+        if mark not in _TEXT_MARKS:
+            return None
+
+        if mark == "error":
+            entry = (mark, content)
+            self.entries.append(entry)
+            if self._text_log:
+                self._text_log.write(content)
+            return entry
+
+        if self._text_log is None:
+            tokens = count_tokens(content)
+            if self._preview_used + tokens <= self.preview_tokens:
+                entry = (mark, content)
+                self.entries.append(entry)
+                self._preview_used += tokens
+                return entry
+
+        self._spill_text(content)
+        return None
+
+    def close(self) -> None:
+        """Finish writing and note where the full text went"""
+        if self._text_log:
+            self._text_log.close()
+            self._text_log = None
+            self.entries.append(
+                ("stdout", f"[output truncated, full text in {self._text_log_path}]")
+            )
+
+    def _spill_text(self, content: str) -> None:
+        if self._text_log is None:
+            self._text_log_path = self._path("txt", "output")
+            self._text_log = open(self._text_log_path, "w", encoding="utf-8")
+            # The log holds everything, so the preview entries are copied in
+            for mark, text in self.entries:
+                if mark in _TEXT_MARKS:
+                    self._text_log.write(text)
+        self._text_log.write(content)
+
+    def _write_file(self, suffix: str, content: str) -> Path:
+        self._file_count += 1
+        path = self._path(_FILE_OUTPUTS[suffix], str(self._file_count))
+        if suffix == "html":
+            path.write_text(content, encoding="utf-8")
+        else:
+            try:
+                path.write_bytes(base64.b64decode(content))
+            except (binascii.Error, ValueError):
+                path.write_text(content, encoding="utf-8")
+        return path
+
+    def _path(self, extension: str, name: str) -> Path:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        return self.directory / f"{self.prefix}_{name}.{extension}"
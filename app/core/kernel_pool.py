@@ -0,0 +1,149 @@
+import atexit
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Tuple
+
+import jupyter_client
+
+from app.config import Config
+from app.core.kernel_supervisor import apply_limits
+from app.core.metrics import metrics
+
+# (KernelManager, BlockingKernelClient) as returned by start_new_kernel
+Kernel = Tuple[Any, Any]
+
+
+class KernelPool:
+    """Keeps a few warmed-up Jupyter kernels ready to hand out
+
+    Starting a kernel takes seconds, so idle kernels are started in the
+    background and the warm-up code (typically heavy imports) is run in
+    each before its namespace is reset. Kernels are never reused after a
+    session: `release` shuts them down and a fresh one takes their place.
+    """
+
+    def __init__(self, size: int, warmup_code: str = "", kernel_name="python3"):
+        self.size = size
+        self.warmup_code = warmup_code
+        self.kernel_name = kernel_name
+        self._idle: Deque[Kernel] = deque()
+        self._starting = 0
+        self._closed = False
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def start(self) -> None:
+        """Begin filling the pool in the background"""
+        atexit.register(self.shutdown)
+        self._refill()
+
+    def acquire(self) -> Kernel:
+        """Take an idle kernel, starting one inline if none is ready"""
+        with self._lock:
+            kernel = self._idle.popleft() if self._idle else None
+            if kernel:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        if kernel is None:
+            kernel = self._start_kernel(warm=False)
+        self._refill()
+        return kernel
+
+    def release(self, kernel: Kernel) -> None:
+        """Shut a used kernel down off the calling thread and replace it"""
+        threading.Thread(
+            target=self._shutdown_kernel, args=(kernel,), daemon=True
+        ).start()
+        self._refill()
+
+    def shutdown(self) -> None:
+        """Stop refilling and shut down all idle kernels"""
+        with self._lock:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+        for kernel in idle:
+            self._shutdown_kernel(kernel)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": self.size,
+            "idle": len(self._idle),
+            "starting": self._starting,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def _refill(self) -> None:
+        with self._lock:
+            missing = self.size - len(self._idle) - self._starting
+            if self._closed or missing <= 0:
+                return
+            self._starting += missing
+
+        for _ in range(missing):
+            threading.Thread(
+                target=self._add_kernel, name="kernel-pool-warmup", daemon=True
+            ).start()
+
+    def _add_kernel(self) -> None:
+        try:
+            kernel = self._start_kernel(warm=True)
+        except Exception as e:
+            print(f"Error starting pooled kernel: {e}")
+            with self._lock:
+                self._starting -= 1
+            return
+
+        with self._lock:
+            self._starting -= 1
+            closed = self._closed
+            if not closed:
+                self._idle.append(kernel)
+        if closed:
+            self._shutdown_kernel(kernel)
+
+    def _start_kernel(self, warm: bool) -> Kernel:
+        manager, client = jupyter_client.manager.start_new_kernel(
+            kernel_name=self.kernel_name,
+            startup_timeout=Config.KERNEL_STARTUP_TIMEOUT,
+        )
+        if warm and self.warmup_code:
+            try:
+                self._run(client, self.warmup_code)
+                # Imported modules stay cached, but each session starts clean
+                self._run(client, "%reset -f")
+            except Exception:
+                self._shutdown_kernel((manager, client))
+                raise
+        # After warm-up: under RLIMIT_AS, OpenBLAS can fail to allocate its
+        # per-core thread buffers while numpy is being imported
+        apply_limits(manager)
+        return manager, client
+
+    @staticmethod
+    def _run(client, code: str) -> None:
+        reply = client.execute_interactive(
+            code,
+            store_history=False,
+            output_hook=lambda msg: None,
+            timeout=Config.KERNEL_STARTUP_TIMEOUT,
+        )
+        if reply["content"].get("status") != "ok":
+            print(f"Kernel warm-up failed: {reply['content'].get('evalue')}")
+
+    @staticmethod
+    def _shutdown_kernel(kernel: Kernel) -> None:
+        manager, client = kernel
+        try:
+            client.stop_channels()
+            manager.shutdown_kernel(now=True)
+        except Exception as e:
+            print(f"Error shutting down kernel: {e}")
+
+
+kernel_pool = KernelPool(Config.KERNEL_POOL_SIZE, Config.KERNEL_WARMUP_CODE)
+metrics.register("kernel_pool", kernel_pool.stats)
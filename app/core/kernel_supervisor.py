@@ -0,0 +1,203 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+from app.config import Config
+from app.core.metrics import metrics
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def kernel_pid(manager) -> Optional[int]:
+    """Process id of a kernel started by a jupyter_client KernelManager"""
+    provisioner = getattr(manager, "provisioner", None)
+    if provisioner is not None:
+        return getattr(provisioner, "pid", None)
+    return getattr(getattr(manager, "kernel", None), "pid", None)
+
+
+def apply_limits(manager) -> None:
+    """Cap a kernel's address space and CPU time with setrlimit
+
+    Limits of 0 are left unset. Needs `resource.prlimit` (Linux); elsewhere
+    kernels run unconstrained.
+    """
+    pid = kernel_pid(manager)
+    if pid is None or resource is None or not hasattr(resource, "prlimit"):
+        return
+
+    limits = [
+        (resource.RLIMIT_AS, Config.KERNEL_MEMORY_LIMIT_MB * 1024 * 1024),
+        (resource.RLIMIT_CPU, Config.KERNEL_CPU_LIMIT_SECONDS),
+    ]
+    for limit, value in limits:
+        if value > 0:
+            try:
+                resource.prlimit(pid, limit, (value, value))
+            except (OSError, ValueError) as e:
+                print(f"Could not set rlimit on kernel {pid}: {e}")
+
+
+def rss_bytes(pid: Optional[int]) -> Optional[int]:
+    """Resident set size of a process, read from /proc"""
+    if pid is None:
+        return None
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+class _Tracked:
+    def __init__(self, kernel, owner: str):
+        self.kernel = kernel
+        self.owner = owner
+        self.last_used = time.monotonic()
+
+
+class KernelSupervisor:
+    """Tracks every live JupyterKernel and shuts down the ones left behind
+
+    Kernels idle for longer than KERNEL_IDLE_TIMEOUT are reaped by a
+    background thread. At most KERNEL_MAX_COUNT kernels run at once; when a
+    new one is needed the least recently used idle kernel is shut down.
+    Reaped kernels restart transparently (with a fresh namespace) the next
+    time they are used.
+    """
+
+    def __init__(self, max_kernels: int, idle_timeout: float, interval: float = 60):
+        self.max_kernels = max_kernels
+        self.idle_timeout = idle_timeout
+        self.interval = interval
+        self._kernels: Dict[int, _Tracked] = {}
+        # Kept apart from _kernels so a kernel reaped and re-registered
+        # while it is in use stays marked busy
+        self._busy: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self.reaped = 0
+        self.evicted = 0
+
+    def register(self, kernel, owner: str) -> None:
+        with self._lock:
+            self._kernels[id(kernel)] = _Tracked(kernel, owner)
+        self._ensure_reaper()
+
+    def unregister(self, kernel) -> None:
+        with self._lock:
+            self._kernels.pop(id(kernel), None)
+
+    def make_room(self) -> None:
+        """Shut down least recently used idle kernels to stay under the cap"""
+        while True:
+            with self._lock:
+                if len(self._kernels) < self.max_kernels:
+                    return
+                idle = [t for t in self._kernels.values() if not self._is_busy(t)]
+                if not idle:
+                    raise RuntimeError(
+                        f"All {self.max_kernels} Jupyter kernels are busy"
+                    )
+                victim = min(idle, key=lambda t: t.last_used)
+                self._kernels.pop(id(victim.kernel))
+            print(f"Evicting idle kernel owned by {victim.owner}")
+            self.evicted += 1
+            victim.kernel.shutdown()
+
+    @contextmanager
+    def in_use(self, kernel):
+        """Mark a kernel busy so it isn't reaped while executing
+
+        The mark covers a kernel restarted inside the block, which is
+        registered again under the same kernel object.
+        """
+        key = id(kernel)
+        with self._lock:
+            self._busy[key] = self._busy.get(key, 0) + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                count = self._busy.pop(key) - 1
+                if count:
+                    self._busy[key] = count
+                tracked = self._kernels.get(key)
+                if tracked:
+                    tracked.last_used = time.monotonic()
+
+    def _is_busy(self, tracked: _Tracked) -> bool:
+        return bool(self._busy.get(id(tracked.kernel)))
+
+    def reap(self) -> int:
+        """Shut down kernels idle for longer than the timeout"""
+        cutoff = time.monotonic() - self.idle_timeout
+        with self._lock:
+            expired = [
+                t
+                for t in self._kernels.values()
+                if not self._is_busy(t) and t.last_used < cutoff
+            ]
+            for tracked in expired:
+                self._kernels.pop(id(tracked.kernel))
+
+        for tracked in expired:
+            print(f"Reaping idle kernel owned by {tracked.owner}")
+            tracked.kernel.shutdown()
+        self.reaped += len(expired)
+        return len(expired)
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            tracked = [(t, self._is_busy(t)) for t in self._kernels.values()]
+        kernels: List[Dict[str, Any]] = []
+        for t, busy in tracked:
+            rss = rss_bytes(kernel_pid(t.kernel.kernel_manager))
+            kernels.append(
+                {
+                    "owner": t.owner,
+                    "busy": busy,
+                    "idle_seconds": round(now - t.last_used),
+                    "rss_mb": round(rss / 1024 / 1024, 1) if rss else None,
+                }
+            )
+        return {
+            "live": len(kernels),
+            "max": self.max_kernels,
+            "total_rss_mb": round(sum(k["rss_mb"] or 0 for k in kernels), 1),
+            "reaped": self.reaped,
+            "evicted": self.evicted,
+            "kernels": kernels,
+        }
+
+    def _ensure_reaper(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if not (self._thread and self._thread.is_alive()):
+                self._thread = threading.Thread(
+                    target=self._run, name="kernel-reaper", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.reap()
+            except Exception as e:
+                print(f"Error reaping kernels: {e}")
+
+
+kernel_supervisor = KernelSupervisor(
+    Config.KERNEL_MAX_COUNT, Config.KERNEL_IDLE_TIMEOUT
+)
+metrics.register("kernels", kernel_supervisor.stats)
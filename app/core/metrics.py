@@ -0,0 +1,26 @@
+from typing import Any, Callable, Dict
+
+
+class MetricsRegistry:
+    """Collects stats from caches, pools and clients for the Debug tab"""
+
+    def __init__(self):
+        self.sources: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+    def register(self, name: str, func: Callable[[], Dict[str, Any]]) -> None:
+        """Register a function returning a dict of stats under `name`"""
+        self.sources[name] = func
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the current stats of every registered source"""
+        snapshot = {}
+        for name, func in self.sources.items():
+            try:
+                snapshot[name] = func()
+            except Exception as e:
+                snapshot[name] = {"error": str(e)}
+        return snapshot
+
+
+# Create a global metrics registry
+metrics = MetricsRegistry()
@@ -0,0 +1,83 @@
+import threading
+from typing import Any, Dict, Optional
+
+import httpx
+from openai import DefaultHttpxClient, OpenAI
+
+from app.config import Config
+from app.core.metrics import metrics
+
+
+class ConnectionStats:
+    """Counts requests against newly opened connections to measure reuse"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.new_connections = 0
+
+    def record_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    def record_connection(self, event_name: str) -> None:
+        # httpcore emits this once per freshly established TCP connection
+        if event_name == "connection.connect_tcp.complete":
+            with self._lock:
+                self.new_connections += 1
+
+    def stats(self) -> Dict[str, Any]:
+        reused = max(self.requests - self.new_connections, 0)
+        return {
+            "requests": self.requests,
+            "new_connections": self.new_connections,
+            "reuse_ratio": reused / self.requests if self.requests else 0.0,
+        }
+
+
+connection_stats = ConnectionStats()
+
+_client: Optional[OpenAI] = None
+_lock = threading.Lock()
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=Config.OPENAI_MAX_CONNECTIONS,
+        max_keepalive_connections=Config.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=Config.OPENAI_KEEPALIVE_EXPIRY,
+    )
+
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(Config.OPENAI_TIMEOUT, connect=Config.OPENAI_CONNECT_TIMEOUT)
+
+
+def _trace(event_name: str, info: Dict[str, Any]) -> None:
+    connection_stats.record_connection(event_name)
+
+
+def _on_request(request: httpx.Request) -> None:
+    connection_stats.record_request()
+    request.extensions["trace"] = _trace
+
+
+def get_openai_client() -> OpenAI:
+    """Return the process-wide OpenAI client backed by a keep-alive pool"""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = OpenAI(
+                    api_key=Config.OPENAI_API_KEY,
+                    max_retries=Config.OPENAI_MAX_RETRIES,
+                    http_client=DefaultHttpxClient(
+                        limits=_limits(),
+                        timeout=_timeout(),
+                        event_hooks={"request": [_on_request]},
+                    ),
+                )
+    return _client
+
+
+metrics.register("openai_connections", connection_stats.stats)
@@ -0,0 +1,44 @@
+import hashlib
+from typing import Any, Dict
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, Template
+
+from app.config import Config
+
+
+def _create_environment() -> Environment:
+    """Shared Jinja environment for the templates in app/views
+
+    Jinja compiles each template once and keeps it by path. The compiled
+    bytecode is also written to TEMPLATE_CACHE_DIR, so restarts skip
+    compilation. In debug mode, templates are re-read when their mtime
+    changes.
+    """
+    Config.TEMPLATE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    return Environment(
+        loader=FileSystemLoader(Config.TEMPLATE_DIR),
+        bytecode_cache=FileSystemBytecodeCache(str(Config.TEMPLATE_CACHE_DIR)),
+        auto_reload=Config.DEBUG,
+    )
+
+
+template_environment = _create_environment()
+
+# Templates registered in code, compiled once per distinct source
+_string_templates: Dict[str, Template] = {}
+
+
+def get_template(path: str) -> Template:
+    return template_environment.get_template(path)
+
+
+def from_string(source: str) -> Template:
+    key = hashlib.sha256(source.encode("utf-8")).hexdigest()
+    template = _string_templates.get(key)
+    if template is None:
+        template = _string_templates[key] = template_environment.from_string(source)
+    return template
+
+
+def render(path: str, **context: Any) -> str:
+    return get_template(path).render(**context)
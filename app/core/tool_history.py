@@ -0,0 +1,81 @@
+import queue
+import threading
+import time
+from datetime import timezone
+from typing import Any, Dict, List, Optional
+
+from app.core.compaction import serialize_result
+
+# Longest result text persisted per call
+RESULT_PREVIEW_CHARS = 4000
+
+
+class ToolCallRecorder:
+    """Persists tool calls from a background thread in small batches
+
+    `record` never touches the database, so tool execution is not slowed
+    down by the write. Entries are flushed every `flush_interval` seconds
+    or once `batch_size` are queued.
+    """
+
+    def __init__(self, batch_size: int = 50, flush_interval: float = 1.0):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=10000)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def record(self, entry: Dict[str, Any], session_id: Optional[str] = None) -> None:
+        result = serialize_result(entry["result"])
+        row = {
+            "tool": entry["tool"],
+            "session_id": session_id,
+            "arguments": entry["arguments"],
+            "result_preview": result[:RESULT_PREVIEW_CHARS],
+            "success": entry["success"],
+            "cached": entry.get("cached", False),
+            "duration": entry["duration"],
+            # Tool timestamps are local; the table stores naive UTC like
+            # every other created_at column
+            "created_at": entry["timestamp"]
+            .astimezone(timezone.utc)
+            .replace(tzinfo=None),
+        }
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            print("Tool history queue full, dropping record")
+            return
+        self._ensure_worker()
+
+    def _ensure_worker(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if not (self._thread and self._thread.is_alive()):
+                self._thread = threading.Thread(
+                    target=self._run, name="tool-history-writer", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self) -> None:
+        # Imported here so loading tools doesn't open a database connection
+        from app.services.tool_call import ToolCallService
+
+        while True:
+            batch: List[Dict[str, Any]] = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            try:
+                while len(batch) < self.batch_size:
+                    timeout = max(deadline - time.monotonic(), 0)
+                    batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                pass
+
+            try:
+                ToolCallService.record_calls(batch)
+            except Exception as e:
+                print(f"Dropped {len(batch)} tool history records: {e}")
+
+
+tool_call_recorder = ToolCallRecorder()
@@ -3,14 +3,25 @@ from pydantic import create_model
 import inspect
 import json
 from inspect import Parameter
-from typing import Any, Callable, List, Dict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from typing import Any, Callable, Deque, List, Dict, Optional, Tuple
+from collections import deque
 import asyncio
+import copy
 import importlib
 import pkgutil
 import app.tools as tools_package
 import sys
 import os
+import threading
+import weakref
 from pathlib import Path
+from app.config import Config
+from app.core.compaction import compact_result
+from app.core.metrics import metrics
+from app.core.tool_history import tool_call_recorder
+from app.utils.lru import LRUCache, MISSING
 
 
 # Add the new tool management classes/functions
@@ -72,31 +83,255 @@ def call_func(
     return f(**json.loads(arguments))
 
 
-def tool(f: Callable) -> Callable:
-    """Decorator to mark a function as a tool"""
-    f._is_tool = True
-    return f
+class ToolRegistry:
+    """Process-wide registry of functions decorated with @tool
+
+    Tool modules in `app/tools` are imported once; the decorator registers
+    each function by name as the module loads. With hot reload enabled,
+    modules whose file mtime changed are re-imported on the next lookup.
+    """
+
+    def __init__(self, tools_dir: Path, package: str, hot_reload: bool = False):
+        self.tools_dir = tools_dir
+        self.package = package
+        self.hot_reload = hot_reload
+        self._tools: Dict[str, Callable] = {}
+        self._mtimes: Dict[str, float] = {}
+        self._discovered = False
+        self._lock = threading.RLock()
+
+    def register(self, func: Callable) -> None:
+        with self._lock:
+            self._tools[func.__name__] = func
+
+    def get(self, name: str) -> Optional[Callable]:
+        self._refresh()
+        return self._tools.get(name)
+
+    def all(self) -> List[Callable]:
+        self._refresh()
+        return list(self._tools.values())
+
+    def _refresh(self) -> None:
+        if self._discovered and not self.hot_reload:
+            return
+        with self._lock:
+            for file in self.tools_dir.glob("*.py"):
+                if file.name == "__init__.py":
+                    continue
+                module_name = f"{self.package}.{file.stem}"
+                mtime = file.stat().st_mtime
+                if self._mtimes.get(module_name) == mtime:
+                    continue
+                self._load(module_name)
+                self._mtimes[module_name] = mtime
+
+            # Build schemas up front so registration never touches pydantic
+            for func in self._tools.values():
+                tool_schemas(func)
+
+            if not self._discovered:
+                print("Found tools:", list(self._tools))
+            self._discovered = True
+
+    def _load(self, module_name: str) -> None:
+        try:
+            if module_name in sys.modules and module_name in self._mtimes:
+                # Drop the old definitions so removed tools disappear
+                self._tools = {
+                    name: f
+                    for name, f in self._tools.items()
+                    if f.__module__ != module_name
+                }
+                importlib.reload(sys.modules[module_name])
+                print(f"Reloaded tools from {module_name}")
+            else:
+                importlib.import_module(module_name)
+        except ImportError as e:
+            print(f"Error importing {module_name}: {e}")
+
+
+tool_registry = ToolRegistry(
+    Path(__file__).parent.parent / "tools",
+    package="app.tools",
+    hot_reload=Config.TOOL_HOT_RELOAD,
+)
+
+
+def tool(f: Optional[Callable] = None, **options) -> Callable:
+    """Decorator to mark a function as a tool
+
+    Can be used bare (`@tool`) or with options, e.g.
+    `@tool(compaction="snippets", max_tokens=1500)`:
+        compaction: how to shrink oversized results ("auto", "truncate",
+            "structure", "snippets" or "spill")
+        max_tokens: token budget for the result sent back to the model
+        cache_ttl: seconds to cache results per argument set (off if unset)
+        cache_key: function taking the tool's arguments and returning a
+            hashable cache key (defaults to the JSON-encoded arguments)
+        cache_max_entries: LRU size of the tool's cache (default 128)
+        timeout: seconds before the call is cancelled and an error is
+            returned to the model (defaults to TOOL_DEFAULT_TIMEOUT)
+        max_concurrency: how many calls of this tool may run at once
+            across all sessions (unlimited if unset)
+    """
+
+    def decorator(func: Callable) -> Callable:
+        func._is_tool = True
+        func._tool_options = options
+        tool_registry.register(func)
+        return func
+
+    return decorator(f) if f else decorator
 
 
 def bind_kernel(f: Callable, kernel) -> Callable:
     """Bind a kernel to a function that needs it"""
 
-    def wrapped(*args, **kwargs):
-        if "kernel" not in kwargs:
-            kwargs["kernel"] = kernel
-        return f(*args, **kwargs)
+    if asyncio.iscoroutinefunction(f):
+
+        async def wrapped(*args, **kwargs):
+            if "kernel" not in kwargs:
+                kwargs["kernel"] = kernel
+            return await f(*args, **kwargs)
+
+    else:
+
+        def wrapped(*args, **kwargs):
+            if "kernel" not in kwargs:
+                kwargs["kernel"] = kernel
+            return f(*args, **kwargs)
 
     # Preserve the original function's metadata
+    wrapped.__wrapped__ = f
     wrapped._is_tool = getattr(f, "_is_tool", False)
+    wrapped._tool_options = getattr(f, "_tool_options", {})
     wrapped.__name__ = f.__name__
     wrapped.__doc__ = f.__doc__
     return wrapped
 
 
-def create_openai_chat_schema(f: Callable) -> Dict[str, Any]:
-    """Create a function schema for OpenAI's chat completion API format"""
+class ToolResultCache:
+    """Per-tool LRU caches for tools declared with `@tool(cache_ttl=...)`"""
+
+    def __init__(self):
+        self._caches: Dict[str, LRUCache] = {}
+        self._lock = threading.Lock()
+
+    def _cache_for(self, tool_name: str, options: Dict) -> Optional[LRUCache]:
+        if not options.get("cache_ttl"):
+            return None
+        with self._lock:
+            if tool_name not in self._caches:
+                self._caches[tool_name] = LRUCache(
+                    max_entries=options.get("cache_max_entries", 128),
+                    ttl=options["cache_ttl"],
+                )
+            return self._caches[tool_name]
+
+    @staticmethod
+    def _key(options: Dict, args: Dict) -> Any:
+        key_func = options.get("cache_key")
+        if key_func:
+            return key_func(**args)
+        return json.dumps(args, sort_keys=True, default=str)
+
+    def get(self, tool_name: str, options: Dict, args: Dict) -> Any:
+        cache = self._cache_for(tool_name, options)
+        if cache is None:
+            return MISSING
+        result = cache.get(self._key(options, args))
+        # Each caller gets its own copy, so mutations don't leak into the cache
+        return result if result is MISSING else copy.deepcopy(result)
+
+    def set(self, tool_name: str, options: Dict, args: Dict, result: Any) -> None:
+        cache = self._cache_for(tool_name, options)
+        # Failed calls are retried rather than cached
+        if cache is None or result is None:
+            return
+        if isinstance(result, dict) and "error" in result:
+            return
+        cache.set(self._key(options, args), copy.deepcopy(result))
+
+    def stats(self) -> Dict[str, Any]:
+        return {name: cache.stats() for name, cache in self._caches.items()}
+
+
+tool_result_cache = ToolResultCache()
+metrics.register("tool_result_cache", tool_result_cache.stats)
+
+
+class ToolTimeoutError(Exception):
+    """Raised when a tool exceeds its declared timeout"""
+
+    def __init__(self, tool_name: str, timeout: float):
+        super().__init__(f"Tool {tool_name} timed out after {timeout}s")
+        self.tool_name = tool_name
+        self.timeout = timeout
+
+
+class ToolLimiter:
+    """Shared per-tool semaphores enforcing `@tool(max_concurrency=...)`
+
+    Blocking tools run on a bounded thread pool. A timeout can't stop a
+    thread, so a timed-out call keeps its worker until it returns; those
+    threads are counted as abandoned, and at most TOOL_MAX_THREADS can
+    pile up before new blocking calls wait (and time out) in the queue.
+    """
+
+    def __init__(self, max_threads: int):
+        # asyncio semaphores are bound to the loop they are first used on
+        self._semaphores: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self.max_threads = max_threads
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_threads, thread_name_prefix="tool"
+        )
+        self._abandoned: set = set()
+
+    def semaphore(
+        self, tool_name: str, max_concurrency: Optional[int]
+    ) -> Optional[asyncio.Semaphore]:
+        if not max_concurrency:
+            return None
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            semaphores = self._semaphores.setdefault(loop, {})
+            if tool_name not in semaphores:
+                semaphores[tool_name] = asyncio.Semaphore(max_concurrency)
+            return semaphores[tool_name]
+
+    def abandon(self, tool_name: str, task: asyncio.Future) -> None:
+        """Note a timed-out blocking call whose thread is still running"""
+        with self._lock:
+            if task.done():
+                return
+            self._abandoned.add(task)
+            count = len(self._abandoned)
+        print(f"Tool {tool_name} timed out; {count} abandoned tool thread(s) running")
+
+    def finished(self, task: asyncio.Future) -> None:
+        with self._lock:
+            self._abandoned.discard(task)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_threads": self.max_threads,
+            "abandoned_threads": len(self._abandoned),
+        }
+
+
+tool_limiter = ToolLimiter(Config.TOOL_MAX_THREADS)
+metrics.register("tool_threads", tool_limiter.stats)
+
+
+@lru_cache(maxsize=None)
+def _cached_schemas(
+    f: Callable, signature: str
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Build the WebSocket and chat schemas once per function and signature"""
     base_schema = schema(f)
-    return {
+    chat_schema = {
         "type": "function",
         "function": {
             "name": base_schema["name"],
@@ -104,11 +339,27 @@ def create_openai_chat_schema(f: Callable) -> Dict[str, Any]:
             "parameters": base_schema["parameters"],
         },
     }
+    return base_schema, chat_schema
+
+
+def tool_schemas(f: Callable) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Return the memoized (websocket, chat) schemas for a tool
+
+    Wrappers such as `bind_kernel` resolve to the function they wrap, so a
+    tool's schemas are shared across sessions. Treat them as read-only.
+    """
+    original_func = getattr(f, "__wrapped__", f)
+    return _cached_schemas(original_func, str(inspect.signature(original_func)))
+
+
+def create_openai_chat_schema(f: Callable) -> Dict[str, Any]:
+    """Create a function schema for OpenAI's chat completion API format"""
+    return tool_schemas(f)[1]
 
 
 def create_websocket_schema(f: Callable) -> Dict[str, Any]:
     """Create a function schema for WebSocket API format (original format)"""
-    return schema(f)  # Use the original schema function
+    return tool_schemas(f)[0]
 
 
 class ToolManager:
@@ -117,43 +368,21 @@ class ToolManager:
         self.chat_tools: List[Dict[str, Any]] = []  # New list for chat interface tools
         self.available_functions: Dict[str, Callable] = {}
         self.tool_choice = "none"
-        self.tool_history: List[Dict[str, Any]] = []
+        # Recent calls only; the full history is persisted to tool_calls
+        self.tool_history: Deque[Dict[str, Any]] = deque(
+            maxlen=Config.TOOL_HISTORY_MAX_ENTRIES
+        )
         self.jupyter_kernel = None
+        self.session_id = None
 
     def get_available_tools(self) -> List[Callable]:
         """Return list of all tool functions marked with @tool decorator"""
-        tools = []
-
-        # Get the tools directory path
-        tools_dir = Path(__file__).parent.parent / "tools"
-
-        # Import all Python files in the tools directory
-        for file in tools_dir.glob("*.py"):
-            if file.name != "__init__.py":
-                module_name = f"app.tools.{file.stem}"
-                if module_name not in sys.modules:
-                    try:
-                        importlib.import_module(module_name)
-                    except ImportError as e:
-                        print(f"Error importing {module_name}: {e}")
-
-        # Look through all loaded modules in the tools package
-        for module_name, module in sys.modules.items():
-            if module_name.startswith("app.tools.") and not module_name.endswith(
-                "__init__"
-            ):
-                if module:  # Check if module is not None
-                    # Get all functions marked with @tool decorator
-                    tools.extend(
-                        [
-                            obj
-                            for _, obj in inspect.getmembers(module)
-                            if inspect.isfunction(obj) and hasattr(obj, "_is_tool")
-                        ]
-                    )
-
-        print("Found tools:", [tool.__name__ for tool in tools])
-        return tools
+        return tool_registry.all()
+
+    def get_tools(self, names: List[str]) -> List[Callable]:
+        """Look up tool functions by name, skipping unknown names"""
+        tools = [tool_registry.get(name) for name in names]
+        return [f for f in tools if f is not None]
 
     def register_tools(self, functions: List[Callable]) -> None:
         """Register functions as tools for the AI to use"""
@@ -174,13 +403,30 @@ class ToolManager:
         self.tool_choice = "auto" if self.tools else "none"
         self.available_functions = {f.__name__: f for f in bound_functions}
 
+    def format_result(self, tool_name: str, result: Any) -> str:
+        """Serialize a tool result for the model, within the tool's token budget"""
+        func = self.available_functions.get(tool_name)
+        options = getattr(func, "_tool_options", {})
+        spill_dir = (
+            self.jupyter_kernel.work_dir
+            if self.jupyter_kernel
+            else Config.TOOL_OUTPUT_DIR
+        )
+        return compact_result(
+            result,
+            max_tokens=options.get("max_tokens", Config.TOOL_RESULT_MAX_TOKENS),
+            strategy=options.get("compaction", "auto"),
+            spill_dir=spill_dir,
+            label=tool_name,
+        )
+
     async def execute_tool(self, tool_name: str, args: dict) -> dict:
         """Execute a tool by name with the given arguments"""
         start_time = datetime.now()
         try:
             if tool_name not in self.available_functions:
                 error_result = {"error": f"Tool {tool_name} not found"}
-                self.tool_history.append(
+                self._record(
                     {
                         "tool": tool_name,
                         "arguments": args,
@@ -202,15 +448,29 @@ class ToolManager:
                 else:
                     args = {"code": str(args["args"])}
 
-            # Execute the function
-            result = (
-                await func(**args)
-                if asyncio.iscoroutinefunction(func)
-                else func(**args)
-            )
+            # Serve repeated calls from the tool's result cache
+            options = getattr(func, "_tool_options", {})
+            cached = tool_result_cache.get(tool_name, options, args)
+            if cached is not MISSING:
+                self._record(
+                    {
+                        "tool": tool_name,
+                        "arguments": args,
+                        "result": cached,
+                        "timestamp": start_time,
+                        "duration": (datetime.now() - start_time).total_seconds(),
+                        "success": True,
+                        "cached": True,
+                    }
+                )
+                return cached
+
+            # Execute the function within its timeout and concurrency limits
+            result = await self._run_with_limits(tool_name, func, args, options)
+            tool_result_cache.set(tool_name, options, args, result)
 
             # Record successful execution
-            self.tool_history.append(
+            self._record(
                 {
                     "tool": tool_name,
                     "arguments": args,
@@ -222,10 +482,28 @@ class ToolManager:
             )
             return result
 
+        except ToolTimeoutError as e:
+            error_result = {
+                "error": str(e),
+                "error_type": "timeout",
+                "timeout": e.timeout,
+            }
+            self._record(
+                {
+                    "tool": tool_name,
+                    "arguments": args,
+                    "result": error_result,
+                    "timestamp": start_time,
+                    "duration": (datetime.now() - start_time).total_seconds(),
+                    "success": False,
+                }
+            )
+            return error_result
+
         except Exception as e:
             error_result = {"error": str(e)}
             # Record failed execution
-            self.tool_history.append(
+            self._record(
                 {
                     "tool": tool_name,
                     "arguments": args,
@@ -236,3 +514,74 @@ class ToolManager:
                 }
             )
             return error_result
+
+    def _record(self, entry: Dict[str, Any]) -> None:
+        """Keep a call in the in-memory ring and queue it for persistence"""
+        self.tool_history.append(entry)
+        tool_call_recorder.record(entry, session_id=self.session_id)
+
+    async def _run_with_limits(
+        self, tool_name: str, func: Callable, args: dict, options: Dict
+    ) -> Any:
+        """Run a tool under its semaphore and timeout, cancelling on expiry
+
+        Timeouts don't stop a blocking tool's thread: it is left running,
+        counted by `tool_limiter`, and keeps its permit until it ends.
+        """
+        timeout = options.get("timeout", Config.TOOL_DEFAULT_TIMEOUT)
+        semaphore = tool_limiter.semaphore(tool_name, options.get("max_concurrency"))
+        threads = []
+
+        async def run():
+            if semaphore:
+                await semaphore.acquire()
+            if asyncio.iscoroutinefunction(func):
+                try:
+                    return await func(**args)
+                finally:
+                    if semaphore:
+                        semaphore.release()
+
+            # A blocking tool's thread can't be stopped and keeps running
+            # after a timeout, so its permit is held until the thread ends
+            def release(task):
+                if semaphore:
+                    semaphore.release()
+                tool_limiter.finished(task)
+                if not task.cancelled():
+                    task.exception()  # retrieved, even if nobody awaits it
+
+            task = asyncio.ensure_future(self._call(func, args))
+            task.add_done_callback(release)
+            threads.append(task)
+            return await asyncio.shield(task)
+
+        try:
+            return await asyncio.wait_for(run(), timeout)
+        except asyncio.TimeoutError:
+            self._cancel(func)
+            for task in threads:
+                tool_limiter.abandon(tool_name, task)
+            raise ToolTimeoutError(tool_name, timeout)
+        except asyncio.CancelledError:
+            # The caller went away (e.g. the session ended); stop the work too
+            self._cancel(func)
+            for task in threads:
+                tool_limiter.abandon(tool_name, task)
+            raise
+
+    @staticmethod
+    async def _call(func: Callable, args: dict) -> Any:
+        if asyncio.iscoroutinefunction(func):
+            return await func(**args)
+        # Keep blocking tools off the event loop, on the bounded tool pool
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(tool_limiter.executor, partial(func, **args))
+
+    def _cancel(self, func: Callable) -> None:
+        """Propagate cancellation to work that outlives the awaiting task"""
+        # Async kernel tools interrupt the kernel themselves when cancelled
+        if asyncio.iscoroutinefunction(func):
+            return
+        if self.jupyter_kernel and "kernel" in inspect.signature(func).parameters:
+            self.jupyter_kernel.send_interrupt_signal()
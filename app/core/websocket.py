@@ -96,16 +96,22 @@ class WebSocketManager:
         # Generate a unique session ID
         self.session_id = datetime.now().strftime("%Y%m%d_%H%M%S")
         print(f"Generated Session ID: {self.session_id}")  # Debug print
+        self.tool_manager.session_id = self.session_id
 
-        # Initialize Jupyter kernel if Python tool is selected
-        if any(tool.get("name") == "python" for tool in self.tool_manager.tools):
+        # Initialize Jupyter kernel if Python tool is selected and the
+        # session hasn't already started one for it
+        if self.tool_manager.jupyter_kernel:
+            self.jupyter_kernel = self.tool_manager.jupyter_kernel
+        elif any(tool.get("name") == "python" for tool in self.tool_manager.tools):
             print(
                 f"Python tool detected, initializing Jupyter kernel in ./notebooks/{self.session_id}"
             )  # Debug print
             from app.core.jupyter import JupyterKernel
 
             work_dir = f"./notebooks/{self.session_id}"
-            self.jupyter_kernel = JupyterKernel(work_dir)
+            self.jupyter_kernel = JupyterKernel(
+                work_dir, owner=f"voice-{self.session_id}"
+            )
             # Update the Python tool to use the kernel
             self.tool_manager.jupyter_kernel = self.jupyter_kernel
 
@@ -153,8 +159,9 @@ class WebSocketManager:
         if self.websocket and self.is_connected:
             # Cleanup Jupyter kernel if it exists
             if self.jupyter_kernel:
-                self.jupyter_kernel.kernel_client.shutdown()
+                self.jupyter_kernel.shutdown()
                 self.jupyter_kernel = None
+                self.tool_manager.jupyter_kernel = None
 
             await self.websocket.close()
             self.is_connected = False
@@ -236,13 +243,17 @@ class WebSocketManager:
                             tool_name, tool_args
                         )
 
-                        # Send the result back
+                        # Send the result back; string results stay JSON
+                        # encoded on this channel, as they always have been
+                        output = self.tool_manager.format_result(tool_name, result)
+                        if isinstance(result, str):
+                            output = json.dumps(output)
                         tool_response = {
                             "type": "conversation.item.create",
                             "item": {
                                 "type": "function_call_output",
                                 "call_id": output_item["call_id"],
-                                "output": json.dumps(result),
+                                "output": output,
                             },
                         }
                         self._log_event("SENDING", tool_response)
@@ -1,16 +1,22 @@
 import gradio as gr
-from openai import OpenAI
 from app.core.assistant_manager import AssistantManager
+from app.core.completion_cache import completion_cache
+from app.core.openai_client import get_openai_client
 from app.core.tools import ToolManager
+from app.services.conversation import ConversationService
+from app.utils.streaming import StreamCoalescer
 import json
 
 
 def create_chat_interface(assistant_manager: AssistantManager):
-    client = OpenAI()
+    client = get_openai_client()
 
     # Define available models
     available_models = ["gpt-4o", "gpt-4o-mini", "o1-preview", "o1-mini"]
 
+    # Number of messages shown at once; older turns are loaded on demand
+    page_size = 20
+
     with gr.Column():
         with gr.Row():
             assistant_dropdown = gr.Dropdown(
@@ -26,6 +32,18 @@ def create_chat_interface(assistant_manager: AssistantManager):
                 interactive=True,
             )
 
+        with gr.Row():
+            conversation_dropdown = gr.Dropdown(
+                choices=ConversationService.list_conversations(),
+                label="Conversation",
+                value=None,
+                interactive=True,
+                scale=4,
+            )
+            load_earlier_btn = gr.Button(
+                "Load Earlier Messages", scale=1, visible=False
+            )
+
         chatbot = gr.Chatbot(height=500, type="messages")
         msg = gr.Textbox(
             placeholder="Type your message here...",
@@ -36,16 +54,56 @@ def create_chat_interface(assistant_manager: AssistantManager):
             submit_btn = gr.Button("Submit", scale=1, variant="primary")
             clear_btn = gr.Button("Clear", scale=1)
 
-    async def handle_user_message(message, history, assistant_name, model_name):
-        history = history or []
-        history.append({"role": "user", "content": message})
-        return "", history
+        # The browser only holds the visible page; the DB is the source of truth
+        conversation_id = gr.State(None)
+        display_limit = gr.State(page_size)
+
+    def load_page(conversation, limit):
+        history, has_more = ConversationService.get_display_messages(
+            conversation, limit
+        )
+        return history, gr.update(visible=has_more)
+
+    async def handle_user_message(
+        message, conversation, assistant_name, model_name, limit
+    ):
+        if not message:
+            history, load_earlier = load_page(conversation, limit)
+            return "", history, conversation, load_earlier, gr.update()
+
+        dropdown = gr.update()
+        if conversation is None:
+            conversation = ConversationService.create_conversation(
+                title=message[:80], assistant_name=assistant_name, model=model_name
+            )
+            dropdown = gr.update(
+                choices=ConversationService.list_conversations(), value=conversation
+            )
 
-    async def process_assistant_response(history, assistant_name, model_name):
-        if not history:
+        ConversationService.append_messages(
+            conversation, [{"role": "user", "content": message}]
+        )
+        history, load_earlier = load_page(conversation, limit)
+        return "", history, conversation, load_earlier, dropdown
+
+    async def process_assistant_response(
+        conversation, assistant_name, model_name, limit
+    ):
+        history, _ = ConversationService.get_display_messages(conversation, limit)
+
+        # Rebuild the model context from the stored conversation
+        context = (
+            ConversationService.get_context_messages(conversation)
+            if conversation is not None
+            else []
+        )
+        if not context or context[-1]["role"] != "user":
             yield history
             return
 
+        # Messages produced by this turn, persisted once it completes
+        turn_messages = []
+
         # Get assistant instructions and tools first
         assistant = assistant_manager.get_assistant(assistant_name)
         system_prompt = assistant.get("instructions", "You are a helpful assistant.")
@@ -54,146 +112,173 @@ def create_chat_interface(assistant_manager: AssistantManager):
         # Format messages (same as before)
         messages = []
         if model_name.startswith("o1"):
-            if history and history[0]["role"] == "user":
-                history[0]["content"] = f"{system_prompt}\n\n{history[0]['content']}"
+            if context and context[0]["role"] == "user":
+                context[0]["content"] = f"{system_prompt}\n\n{context[0]['content']}"
             else:
                 messages.append({"role": "user", "content": system_prompt})
         else:
             messages.append({"role": "system", "content": system_prompt})
-        messages.extend(history)
+        messages.extend(context)
 
         # Prepare tools
         function_definitions = []
-        available_tools = {}
         tool_manager = None
 
-        if tools:
-            tool_manager = ToolManager()
-            if "python" in tools:
-                from app.core.jupyter import JupyterKernel
-
-                tool_manager.jupyter_kernel = JupyterKernel("./notebooks/chat")
-            all_tools = tool_manager.get_available_tools()
-            selected_tools = [f for f in all_tools if f.__name__ in tools]
-            tool_manager.register_tools(selected_tools)
-            function_definitions = tool_manager.chat_tools
-            available_tools = tool_manager.available_functions
-
-        # Initial streaming response
-        completion_args = {"model": model_name, "messages": messages, "stream": True}
-
-        if not model_name.startswith("o1"):
-            completion_args["temperature"] = 0.0
-            if function_definitions:
-                completion_args["tools"] = function_definitions
-                completion_args["tool_choice"] = "auto"
-
-        # Create streaming response
-        stream = client.chat.completions.create(**completion_args)
-
-        # Initialize assistant's message
-        history.append({"role": "assistant", "content": ""})
-        collected_message = {
-            "content": "",
-            "tool_calls": {},
-        }  # Changed to dict for index-based tracking
-
-        # Process the stream
-        for chunk in stream:
-            delta = chunk.choices[0].delta
-
-            # Handle content updates
-            if delta.content:
-                collected_message["content"] += delta.content
-                history[-1]["content"] = collected_message["content"]
-                yield history
+        try:
+            if tools:
+                tool_manager = ToolManager()
+                tool_manager.session_id = f"chat-{conversation}"
+                if "python" in tools:
+                    from app.core.jupyter import JupyterKernel
 
-            # Handle tool calls
-            if delta.tool_calls:
-                for tool_call in delta.tool_calls:
-                    if tool_call.index is not None:
-                        index = tool_call.index
-                        # Initialize tool call at index if not exists
-                        if index not in collected_message["tool_calls"]:
-                            collected_message["tool_calls"][index] = {
-                                "id": "",
-                                "function": {"name": "", "arguments": ""},
-                            }
+                    tool_manager.jupyter_kernel = JupyterKernel(
+                        "./notebooks/chat", owner=f"chat-{conversation}"
+                    )
+                selected_tools = tool_manager.get_tools(tools)
+                tool_manager.register_tools(selected_tools)
+                function_definitions = tool_manager.chat_tools
+
+            # Initial streaming response
+            completion_args = {
+                "model": model_name,
+                "messages": messages,
+                "stream": True,
+            }
+
+            if not model_name.startswith("o1"):
+                completion_args["temperature"] = 0.0
+                if function_definitions:
+                    completion_args["tools"] = function_definitions
+                    completion_args["tool_choice"] = "auto"
+
+            # Create streaming response (replayed from cache when enabled)
+            stream = completion_cache.stream(client, completion_args)
+
+            # Initialize assistant's message
+            history.append({"role": "assistant", "content": ""})
+            collected_message = {
+                "content": "",
+                "tool_calls": {},
+            }  # Changed to dict for index-based tracking
+
+            # Only push the history to the browser every ~50ms or 64 chars
+            coalescer = StreamCoalescer()
+
+            # Process the stream
+            for chunk in stream:
+                delta = chunk.choices[0].delta
+
+                # Handle content updates
+                if delta.content:
+                    collected_message["content"] += delta.content
+                    history[-1]["content"] = collected_message["content"]
+                    if coalescer.push(delta.content):
+                        yield history
 
-                        # Update tool call attributes
-                        if tool_call.id:
-                            collected_message["tool_calls"][index]["id"] = tool_call.id
-                        if tool_call.function.name:
-                            collected_message["tool_calls"][index]["function"][
-                                "name"
-                            ] = tool_call.function.name
-                        if tool_call.function.arguments:
-                            collected_message["tool_calls"][index]["function"][
-                                "arguments"
-                            ] += tool_call.function.arguments
-
-        # Convert collected tool calls from dict to list for processing
-        tool_calls_list = list(collected_message["tool_calls"].values())
-
-        # Handle tool execution
-        if tool_calls_list:
-            print(f"\nExecuting {len(tool_calls_list)} tool calls:")
-
-            # Update history with thinking message
-            history[-1]["content"] = (
-                collected_message["content"]
-                or "Let me use some tools to help answer that."
-            )
-            history[-1]["metadata"] = {"title": "Thinking..."}
-            yield history
+                # Handle tool calls
+                if delta.tool_calls:
+                    for tool_call in delta.tool_calls:
+                        if tool_call.index is not None:
+                            index = tool_call.index
+                            # Initialize tool call at index if not exists
+                            if index not in collected_message["tool_calls"]:
+                                collected_message["tool_calls"][index] = {
+                                    "id": "",
+                                    "function": {"name": "", "arguments": ""},
+                                }
+
+                            # Update tool call attributes
+                            if tool_call.id:
+                                collected_message["tool_calls"][index][
+                                    "id"
+                                ] = tool_call.id
+                            if tool_call.function.name:
+                                collected_message["tool_calls"][index]["function"][
+                                    "name"
+                                ] = tool_call.function.name
+                            if tool_call.function.arguments:
+                                collected_message["tool_calls"][index]["function"][
+                                    "arguments"
+                                ] += tool_call.function.arguments
+
+            # Convert collected tool calls from dict to list for processing
+            tool_calls_list = list(collected_message["tool_calls"].values())
+
+            # Handle tool execution
+            if tool_calls_list:
+                print(f"\nExecuting {len(tool_calls_list)} tool calls:")
+
+                # Update history with thinking message
+                history[-1]["content"] = (
+                    collected_message["content"]
+                    or "Let me use some tools to help answer that."
+                )
+                history[-1]["metadata"] = {"title": "Thinking..."}
+                yield history
 
-            tool_results = []
-            for tool_call in tool_calls_list:
-                function_name = tool_call["function"]["name"]
-                try:
-                    function_args = json.loads(tool_call["function"]["arguments"])
-                    print(
-                        f"\nExecuting {function_name} with args: {json.dumps(function_args, indent=2)}"
-                    )
+                tool_results = []
+                for tool_call in tool_calls_list:
+                    function_name = tool_call["function"]["name"]
+                    try:
+                        function_args = json.loads(tool_call["function"]["arguments"])
+                        print(
+                            f"\nExecuting {function_name} with args: {json.dumps(function_args, indent=2)}"
+                        )
 
-                    if function_name in available_tools:
-                        result = available_tools[function_name](**function_args)
-                        print(f"Tool result: {result}")
+                        # Run through the ToolManager for result caching and history
+                        result = await tool_manager.execute_tool(
+                            function_name, function_args
+                        )
+                        if isinstance(result, dict) and "error" in result:
+                            raise RuntimeError(result["error"])
+
+                        # Keep the result within the tool's token budget
+                        output = tool_manager.format_result(function_name, result)
+                        print(f"Tool result: {output}")
                         tool_results.append(
-                            {"tool_call_id": tool_call["id"], "output": str(result)}
+                            {
+                                "tool_call_id": tool_call["id"],
+                                "output": output,
+                                "metadata": {"title": f"Used Tool: {function_name}"},
+                            }
                         )
 
-                        # Replace the "Thinking..." message with the tool result
-                        history[-1] = {
-                            "role": "assistant",
-                            "content": str(result),
-                            "metadata": {"title": f"Used Tool: {function_name}"},
-                        }
+                        # Show the tool result below the "Thinking..." message
+                        history.append(
+                            {
+                                "role": "assistant",
+                                "content": output,
+                                "metadata": {"title": f"Used Tool: {function_name}"},
+                            }
+                        )
+                        yield history
+                    except Exception as e:
+                        print(f"Tool execution error: {str(e)}")  # Debug
+                        error_msg = f"Error executing tool '{function_name}': {str(e)}"
+                        tool_results.append(
+                            {
+                                "tool_call_id": tool_call["id"],
+                                "output": error_msg,
+                                "metadata": {"title": f"Tool Error: {function_name}"},
+                            }
+                        )
+                        history.append(
+                            {
+                                "role": "assistant",
+                                "content": error_msg,
+                                "metadata": {"title": f"Tool Error: {function_name}"},
+                            }
+                        )
                         yield history
-                except Exception as e:
-                    print(f"Tool execution error: {str(e)}")  # Debug
-                    error_msg = f"Error executing tool '{function_name}': {str(e)}"
-                    tool_results.append(
-                        {"tool_call_id": tool_call["id"], "output": error_msg}
-                    )
-                    history.append(
-                        {
-                            "role": "assistant",
-                            "content": error_msg,
-                            "metadata": {"title": f"Tool Error: {function_name}"},
-                        }
-                    )
-                    yield history
 
-            print("\nAll tool results:")  # Debug
-            print(json.dumps(tool_results, indent=2))  # Debug
+                print("\nAll tool results:")  # Debug
+                print(json.dumps(tool_results, indent=2))  # Debug
 
-            # Get final response after tool execution
-            print("\nSending updated messages to OpenAI:")  # Debug
-            print(json.dumps(messages[-3:], indent=2))  # Debug last 3 messages
+                # Get final response after tool execution
+                print("\nSending updated messages to OpenAI:")  # Debug
+                print(json.dumps(messages[-3:], indent=2))  # Debug last 3 messages
 
-            messages.append(
-                {
+                tool_call_message = {
                     "role": "assistant",
                     "content": collected_message["content"],
                     "tool_calls": [
@@ -208,62 +293,142 @@ def create_chat_interface(assistant_manager: AssistantManager):
                         for tool_call in tool_calls_list
                     ],
                 }
-            )
-            for tool_result in tool_results:
-                messages.append(
-                    {
+                messages.append(tool_call_message)
+                turn_messages.append(
+                    {**tool_call_message, "metadata": {"title": "Thinking..."}}
+                )
+                for tool_result in tool_results:
+                    tool_message = {
                         "role": "tool",
                         "tool_call_id": tool_result["tool_call_id"],
                         "content": tool_result["output"],
                     }
+                    messages.append(tool_message)
+                    turn_messages.append(
+                        {**tool_message, "metadata": tool_result["metadata"]}
+                    )
+
+                # Stream final response
+                completion_args["messages"] = messages
+                if "tools" in completion_args:
+                    del completion_args["tools"]
+                    del completion_args["tool_choice"]
+
+                final_stream = completion_cache.stream(client, completion_args)
+
+                # Add final response message
+                history.append({"role": "assistant", "content": ""})
+                coalescer.flush()
+                for chunk in final_stream:
+                    if chunk.choices[0].delta.content:
+                        history[-1]["content"] += chunk.choices[0].delta.content
+                        if coalescer.push(chunk.choices[0].delta.content):
+                            yield history
+
+                turn_messages.append(
+                    {"role": "assistant", "content": history[-1]["content"]}
                 )
+            else:
+                turn_messages.append(
+                    {"role": "assistant", "content": collected_message["content"]}
+                )
+        finally:
+            # Each chat turn gets its own kernel; give it back however the
+            # turn ends (including errors and cancelled generators)
+            if tool_manager and tool_manager.jupyter_kernel:
+                tool_manager.jupyter_kernel.shutdown()
 
-            # Stream final response
-            completion_args["messages"] = messages
-            if "tools" in completion_args:
-                del completion_args["tools"]
-                del completion_args["tool_choice"]
+            # Append-only write of everything this turn produced
+            if turn_messages:
+                ConversationService.append_messages(conversation, turn_messages)
 
-            final_stream = client.chat.completions.create(**completion_args)
+        yield history
 
-            # Add final response message
-            history.append({"role": "assistant", "content": ""})
-            for chunk in final_stream:
-                if chunk.choices[0].delta.content:
-                    history[-1]["content"] += chunk.choices[0].delta.content
-                    yield history
+    def select_conversation(conversation):
+        history, load_earlier = load_page(conversation, page_size)
+        return conversation, page_size, history, load_earlier
 
-        yield history
-        return
+    def load_earlier_messages(conversation, limit):
+        limit += page_size
+        history, load_earlier = load_page(conversation, limit)
+        return limit, history, load_earlier
 
-    def clear_history():
-        return None
+    def new_conversation():
+        return None, page_size, [], gr.update(visible=False), gr.update(value=None)
 
     # Update the event handlers to match the voice chat pattern
+    # The chatbot value is never sent back: handlers work from conversation_id
     msg.submit(
         fn=handle_user_message,
-        inputs=[msg, chatbot, assistant_dropdown, model_dropdown],
-        outputs=[msg, chatbot],
+        inputs=[
+            msg,
+            conversation_id,
+            assistant_dropdown,
+            model_dropdown,
+            display_limit,
+        ],
+        outputs=[
+            msg,
+            chatbot,
+            conversation_id,
+            load_earlier_btn,
+            conversation_dropdown,
+        ],
         queue=True,  # Change to queue=True
     ).then(
         fn=process_assistant_response,
-        inputs=[chatbot, assistant_dropdown, model_dropdown],
+        inputs=[conversation_id, assistant_dropdown, model_dropdown, display_limit],
         outputs=chatbot,
         queue=True,  # Change to queue=True
     )
 
     submit_btn.click(
         fn=handle_user_message,
-        inputs=[msg, chatbot, assistant_dropdown, model_dropdown],
-        outputs=[msg, chatbot],
+        inputs=[
+            msg,
+            conversation_id,
+            assistant_dropdown,
+            model_dropdown,
+            display_limit,
+        ],
+        outputs=[
+            msg,
+            chatbot,
+            conversation_id,
+            load_earlier_btn,
+            conversation_dropdown,
+        ],
         queue=True,  # Change to queue=True
     ).then(
         fn=process_assistant_response,
-        inputs=[chatbot, assistant_dropdown, model_dropdown],
+        inputs=[conversation_id, assistant_dropdown, model_dropdown, display_limit],
         outputs=chatbot,
         queue=True,  # Change to queue=True
     )
 
-    clear_btn.click(lambda: None, None, chatbot, queue=False)
+    conversation_dropdown.input(
+        fn=select_conversation,
+        inputs=[conversation_dropdown],
+        outputs=[conversation_id, display_limit, chatbot, load_earlier_btn],
+    )
+
+    load_earlier_btn.click(
+        fn=load_earlier_messages,
+        inputs=[conversation_id, display_limit],
+        outputs=[display_limit, chatbot, load_earlier_btn],
+    )
+
+    # Clearing starts a new conversation; the old one stays in the database
+    clear_btn.click(
+        fn=new_conversation,
+        outputs=[
+            conversation_id,
+            display_limit,
+            chatbot,
+            load_earlier_btn,
+            conversation_dropdown,
+        ],
+        queue=False,
+    )
 
     return assistant_dropdown
@@ -1,5 +1,6 @@
 import gradio as gr
 from app.core.websocket import WebSocketManager
+from app.core.metrics import metrics
 
 
 def create_debug_interface(ws_manager: WebSocketManager):
@@ -17,9 +18,10 @@ def create_debug_interface(ws_manager: WebSocketManager):
         value="No events logged yet.",
         container=False,
     )
+    metrics_output = gr.JSON(label="Metrics", value={})
     refresh_btn = gr.Button("Refresh Logs")
 
     def update_logs():
-        return ws_manager.get_logs()
+        return ws_manager.get_logs(), metrics.snapshot()
 
-    refresh_btn.click(fn=update_logs, outputs=[debug_output])
+    refresh_btn.click(fn=update_logs, outputs=[debug_output, metrics_output])
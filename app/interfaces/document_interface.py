@@ -1,5 +1,6 @@
 import gradio as gr
 from app.services.document import DocumentService
+from app.services.embedding_job import EmbeddingJobService
 
 document_service = DocumentService()
 
@@ -36,12 +37,19 @@ def create_document_interface():
                 interactive=True,
             )
             save_document_btn = gr.Button("Save Changes", variant="primary")
+            with gr.Row():
+                embedding_status = gr.Markdown()
+                refresh_status_btn = gr.Button("Refresh Status", size="sm")
 
     # Wire up the event handlers
     document_list.change(
         load_document,
         inputs=[document_list],
         outputs=[document_title, document_content, document_published],
+    ).then(load_embedding_status, inputs=[document_list], outputs=[embedding_status])
+
+    refresh_status_btn.click(
+        load_embedding_status, inputs=[document_list], outputs=[embedding_status]
     )
 
     new_document_btn.click(
@@ -63,7 +71,7 @@ def create_document_interface():
             document_list,
         ],
         outputs=[gr.Textbox(visible=False), document_list],
-    )
+    ).then(load_embedding_status, inputs=[document_title], outputs=[embedding_status])
 
     delete_document_btn.click(
         delete_document,
@@ -95,6 +103,15 @@ def load_document(title):
     return "", "", False
 
 
+def load_embedding_status(title):
+    if not title or title == "None":
+        return ""
+    document = document_service.get_document_by_title(title)
+    if not document:
+        return ""
+    return EmbeddingJobService.describe_status("Document", document.id)
+
+
 def create_new_document():
     return "", "", False, gr.update(value="None")
 
@@ -2,6 +2,7 @@ import gradio as gr
 import pandas as pd
 from app.models.base import Session
 from app.models.node import Node, Edge
+from app.services.embedding_job import EmbeddingJobService
 from app.services.knowledge_graph import KnowledgeGraphService
 
 
@@ -51,6 +52,7 @@ def create_knowledge_graph_management_interface(
                 lines=3,
                 interactive=True,
             )
+            embedding_status = gr.Markdown()
             with gr.Row():
                 new_node_btn = gr.Button("Create New Node", variant="primary")
                 delete_node_btn = gr.Button("Delete Node", variant="stop")
@@ -88,7 +90,9 @@ def create_knowledge_graph_management_interface(
                 value="None",
                 interactive=True,
             )
-            add_edge_btn = gr.Button("Add Relationship", variant="primary")
+            with gr.Row():
+                add_edge_btn = gr.Button("Add Relationship", variant="primary")
+                delete_edge_btn = gr.Button("Delete Relationship", variant="stop")
 
     def load_node_list():
         """Refresh the list of nodes in all dropdowns"""
@@ -100,6 +104,36 @@ def create_knowledge_graph_management_interface(
             target_node: gr.update(choices=choices),
         }
 
+    def relationship_tables(session, node_id):
+        """Outgoing and incoming relationship tables for a node"""
+        outgoing = (
+            session.query(Edge, Node)
+            .join(Node, Edge.target_id == Node.id)
+            .filter(Edge.source_id == node_id)
+            .all()
+        )
+
+        incoming = (
+            session.query(Edge, Node)
+            .join(Node, Edge.source_id == Node.id)
+            .filter(Edge.target_id == node_id)
+            .all()
+        )
+
+        # Format relationships
+        outgoing_data = [
+            (edge.relationship_type, target_node.name) for edge, target_node in outgoing
+        ]
+
+        incoming_data = [
+            (source_node.name, edge.relationship_type) for edge, source_node in incoming
+        ]
+
+        return [
+            pd.DataFrame(outgoing_data, columns=["Relationship", "Target Node"]),
+            pd.DataFrame(incoming_data, columns=["Source Node", "Relationship"]),
+        ]
+
     def load_node_details(selected_node):
         """Load details for the selected node"""
         if selected_node == "None":
@@ -109,6 +143,7 @@ def create_knowledge_graph_management_interface(
                 node_description: "",
                 relationships_out: [],
                 relationships_in: [],
+                embedding_status: "",
             }
 
         node_name_raw = selected_node.split(" (")[0]
@@ -121,44 +156,17 @@ def create_knowledge_graph_management_interface(
                     node_description: "",
                     relationships_out: [],
                     relationships_in: [],
+                    embedding_status: "",
                 }
 
-            # Get relationships with proper joins
-            outgoing = (
-                session.query(Edge, Node)
-                .join(Node, Edge.target_id == Node.id)
-                .filter(Edge.source_id == node.id)
-                .all()
-            )
-
-            incoming = (
-                session.query(Edge, Node)
-                .join(Node, Edge.source_id == Node.id)
-                .filter(Edge.target_id == node.id)
-                .all()
-            )
-
-            # Format relationships
-            outgoing_data = [
-                (edge.relationship_type, target_node.name)
-                for edge, target_node in outgoing
-            ]
-
-            incoming_data = [
-                (source_node.name, edge.relationship_type)
-                for edge, source_node in incoming
-            ]
-
+            outgoing_table, incoming_table = relationship_tables(session, node.id)
             return {
                 node_name: node.name,
                 node_type_input: node.node_type,
                 node_description: node.description or "",
-                relationships_out: pd.DataFrame(
-                    outgoing_data, columns=["Relationship", "Target Node"]
-                ),
-                relationships_in: pd.DataFrame(
-                    incoming_data, columns=["Source Node", "Relationship"]
-                ),
+                relationships_out: outgoing_table,
+                relationships_in: incoming_table,
+                embedding_status: EmbeddingJobService.describe_status("Node", node.id),
             }
 
     def create_new_node():
@@ -168,11 +176,13 @@ def create_knowledge_graph_management_interface(
             node_type_input: "Person",
             node_description: "",
             node_list: "None",
+            embedding_status: "",
         }
 
     def save_node(name, node_type, description, current_selection):
         """Save new node or update existing one"""
         try:
+            node = None
             if current_selection == "None":
                 node = knowledge_graph_service.create_node(name, node_type, description)
             else:
@@ -190,7 +200,13 @@ def create_knowledge_graph_management_interface(
                         existing_node.id, name, node_type, description
                     )
 
-            return {**load_node_list(), gr.Info: "Node saved successfully!"}
+            return {
+                **load_node_list(),
+                embedding_status: (
+                    EmbeddingJobService.describe_status("Node", node.id) if node else ""
+                ),
+                gr.Info: "Node saved successfully!",
+            }
         except Exception as e:
             return {gr.Error: f"Error saving node: {str(e)}"}
 
@@ -215,45 +231,38 @@ def create_knowledge_graph_management_interface(
                 )
 
                 if edge:
-                    # Get updated relationships with proper joins
-                    outgoing = (
-                        session.query(Edge, Node)
-                        .join(Node, Edge.target_id == Node.id)
-                        .filter(Edge.source_id == source_node.id)
-                        .all()
-                    )
-
-                    incoming = (
-                        session.query(Edge, Node)
-                        .join(Node, Edge.source_id == Node.id)
-                        .filter(Edge.target_id == source_node.id)
-                        .all()
-                    )
-
-                    # Format relationships
-                    outgoing_data = [
-                        (edge.relationship_type, target_node.name)
-                        for edge, target_node in outgoing
-                    ]
-
-                    incoming_data = [
-                        (source_node.name, edge.relationship_type)
-                        for edge, source_node in incoming
-                    ]
-
-                    return [
-                        pd.DataFrame(
-                            outgoing_data, columns=["Relationship", "Target Node"]
-                        ),
-                        pd.DataFrame(
-                            incoming_data, columns=["Source Node", "Relationship"]
-                        ),
-                    ]
+                    return relationship_tables(session, source_node.id)
                 return [[], []]
         except Exception as e:
             print(f"Error creating relationship: {e}")
             return [[], []]
 
+    def delete_relationship(source, rel_type, target):
+        """Delete the relationship between the selected nodes"""
+        if source == "None" or target == "None" or not rel_type:
+            return [[], []]
+
+        try:
+            source_name = source.split(" (")[0]
+            target_name = target.split(" (")[0]
+
+            with Session() as session:
+                source_node = session.query(Node).filter_by(name=source_name).first()
+                target_node = session.query(Node).filter_by(name=target_name).first()
+
+                if not source_node or not target_node:
+                    return [[], []]
+
+                deleted = knowledge_graph_service.delete_edge(
+                    source_node.id, target_node.id, rel_type
+                )
+                if not deleted:
+                    gr.Warning("Relationship not found")
+                return relationship_tables(session, source_node.id)
+        except Exception as e:
+            print(f"Error deleting relationship: {e}")
+            return [[], []]
+
     def delete_current_node(selected_node):
         """Delete the currently selected node"""
         if selected_node == "None":
@@ -288,18 +297,25 @@ def create_knowledge_graph_management_interface(
             node_description,
             relationships_out,
             relationships_in,
+            embedding_status,
         ],
     )
 
     new_node_btn.click(
         fn=create_new_node,
-        outputs=[node_name, node_type_input, node_description, node_list],
+        outputs=[
+            node_name,
+            node_type_input,
+            node_description,
+            node_list,
+            embedding_status,
+        ],
     )
 
     save_node_btn.click(
         fn=save_node,
         inputs=[node_name, node_type_input, node_description, node_list],
-        outputs=[node_list, source_node, target_node],
+        outputs=[node_list, source_node, target_node, embedding_status],
     )
 
     delete_node_btn.click(
@@ -312,6 +328,7 @@ def create_knowledge_graph_management_interface(
             node_list,
             source_node,
             target_node,
+            embedding_status,
         ],
     )
 
@@ -320,3 +337,9 @@ def create_knowledge_graph_management_interface(
         inputs=[source_node, relationship_type, target_node],
         outputs=[relationships_out, relationships_in],
     )
+
+    delete_edge_btn.click(
+        fn=delete_relationship,
+        inputs=[source_node, relationship_type, target_node],
+        outputs=[relationships_out, relationships_in],
+    )
@@ -1,36 +1,89 @@
 import gradio as gr
 import json
-from app.core.websocket import WebSocketManager
+import pandas as pd
+from app.core.tools import tool_result_cache
+from app.services.tool_call import ToolCallService
 
+PAGE_SIZE = 10
 
-def create_tool_history_interface(ws_manager: WebSocketManager):
+
+def create_tool_history_interface():
     """Create the Tool History interface tab
 
-    Args:
-        ws_manager: The WebSocket manager instance to use for tool history
+    The tab pages through the persisted tool calls of all sessions.
     """
     gr.Markdown("View history of tool calls and their results")
 
-    def format_tool_history():
-        history = ws_manager.tool_manager.tool_history
-        if not history:
-            return "No tool calls recorded yet."
+    def format_cache_stats():
+        cache_stats = tool_result_cache.stats()
+        if not cache_stats:
+            return ""
+
+        markdown = "### Result Cache\n"
+        for tool_name, stats in cache_stats.items():
+            markdown += (
+                f"- **{tool_name}:** {stats['hit_ratio']:.0%} hit ratio "
+                f"({stats['hits']} hits, {stats['misses']} misses)\n"
+            )
+        return markdown + "\n---\n\n"
 
+    def format_entries(history):
         markdown = ""
         for entry in history:
             success_icon = "✅" if entry["success"] else "❌"
             markdown += f"### {success_icon} {entry['tool']}\n"
             markdown += (
-                f"**Time:** {entry['timestamp'].strftime('%Y-%m-%d %H:%M:%S')}\n"
+                f"**Time:** {entry['timestamp'].strftime('%Y-%m-%d %H:%M:%S')} UTC\n"
             )
-            markdown += f"**Duration:** {entry['duration']:.2f}s\n\n"
+            if entry.get("session_id"):
+                markdown += f"**Session:** {entry['session_id']}\n"
+            markdown += f"**Duration:** {entry['duration']:.2f}s\n"
+            if entry.get("cached"):
+                markdown += "**Cache:** hit\n"
+            markdown += "\n"
             markdown += "**Arguments:**\n```json\n"
             markdown += json.dumps(entry["arguments"], indent=2) + "\n```\n\n"
             markdown += "**Result:**\n```json\n"
-            markdown += json.dumps(entry["result"], indent=2) + "\n```\n\n"
+            markdown += entry["result"] + "\n```\n\n"
             markdown += "---\n\n"
         return markdown
 
+    def format_tool_history(page):
+        history, total = ToolCallService.get_page(page, PAGE_SIZE)
+        stats = pd.DataFrame(ToolCallService.get_stats())
+        total_pages = max((total + PAGE_SIZE - 1) // PAGE_SIZE, 1)
+        page_label = f"Page {page + 1} of {total_pages} ({total} calls)"
+
+        if not history:
+            return "No tool calls recorded yet.", stats, page_label
+        return format_cache_stats() + format_entries(history), stats, page_label
+
+    def change_page(page, delta):
+        total = ToolCallService.count_calls()
+        last_page = max((total - 1) // PAGE_SIZE, 0)
+        page = min(max(page + delta, 0), last_page)
+        return (page,) + format_tool_history(page)
+
+    page_state = gr.State(0)
+
+    tool_stats = gr.DataFrame(
+        headers=["Tool", "Calls", "Error Rate", "p50 (s)", "p95 (s)"],
+        label="Per-Tool Statistics",
+    )
     tool_history = gr.Markdown("No tool calls recorded yet.")
+    with gr.Row():
+        prev_page = gr.Button("Newer")
+        page_label = gr.Markdown("Page 1")
+        next_page = gr.Button("Older")
     refresh_history = gr.Button("Refresh History")
-    refresh_history.click(fn=format_tool_history, outputs=[tool_history])
+
+    outputs = [page_state, tool_history, tool_stats, page_label]
+    refresh_history.click(
+        fn=lambda page: change_page(page, 0), inputs=[page_state], outputs=outputs
+    )
+    prev_page.click(
+        fn=lambda page: change_page(page, -1), inputs=[page_state], outputs=outputs
+    )
+    next_page.click(
+        fn=lambda page: change_page(page, 1), inputs=[page_state], outputs=outputs
+    )
@@ -10,6 +10,7 @@ from app.core.websocket import WebSocketManager
 from app.core.assistant_manager import AssistantManager, DEFAULT_INSTRUCTIONS
 from app.interfaces.debug_interface import create_debug_interface
 from app.interfaces.tool_history_interface import create_tool_history_interface
+from app.utils.streaming import StreamCoalescer
 import time
 
 
@@ -94,7 +95,7 @@ def create_voice_chat_interface(
             create_debug_interface(ws_manager)
 
         with gr.Accordion("Tool History", open=False):
-            create_tool_history_interface(ws_manager)
+            create_tool_history_interface()
 
         clear_btn = gr.Button("Clear Chat")
 
@@ -121,6 +122,7 @@ def create_voice_chat_interface(
 
     async def process_bot_response(history):
         """Process the assistant's response and update chat history"""
+        coalescer = StreamCoalescer()
         async for message in ws_manager.websocket:
             event = json.loads(message)
 
@@ -129,7 +131,8 @@ def create_voice_chat_interface(
                 if not history or history[-1]["role"] != "assistant":
                     history.append({"role": "assistant", "content": ""})
                 history[-1]["content"] += event.get("delta", "")
-                yield history
+                if coalescer.push(event.get("delta", "")):
+                    yield history
 
             # Handle audio transcript
             elif event.get("type") == "response.audio_transcript.done":
@@ -140,6 +143,8 @@ def create_voice_chat_interface(
 
             # Break when response is complete
             elif event.get("type") == "response.done":
+                if coalescer.has_pending:
+                    yield history
                 break
 
     def clear_chat():
@@ -155,10 +160,7 @@ def create_voice_chat_interface(
             # Initialize tools first
             if tools_value:
                 print(f"Selected tools: {tools_value}")
-                available_tools = ws_manager.tool_manager.get_available_tools()
-                selected_functions = [
-                    f for f in available_tools if f.__name__ in tools_value
-                ]
+                selected_functions = ws_manager.tool_manager.get_tools(tools_value)
 
                 # Initialize Jupyter kernel before registering tools if Python is selected
                 if "python" in tools_value:
@@ -166,7 +168,9 @@ def create_voice_chat_interface(
                     from app.core.jupyter import JupyterKernel
 
                     work_dir = f"./notebooks/{ws_manager.session_id}"
-                    ws_manager.tool_manager.jupyter_kernel = JupyterKernel(work_dir)
+                    ws_manager.tool_manager.jupyter_kernel = JupyterKernel(
+                        work_dir, owner="voice"
+                    )
 
                 # Register tools after kernel is initialized
                 ws_manager.tool_manager.register_tools(selected_functions)
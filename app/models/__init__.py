@@ -3,5 +3,21 @@ from .vector_embedding import VectorEmbedding
 from .document import Document
 from .assistant import Assistant
 from .node import Node, Edge
+from .conversation import Conversation, Message
+from .tool_call import ToolCall
+from .embedding_cache import EmbeddingCacheEntry
+from .embedding_job import EmbeddingJob
 
-__all__ = ["Base", "VectorEmbedding", "Document", "Assistant", "Node", "Edge"]
+__all__ = [
+    "Base",
+    "VectorEmbedding",
+    "Document",
+    "Assistant",
+    "Node",
+    "Edge",
+    "Conversation",
+    "Message",
+    "ToolCall",
+    "EmbeddingCacheEntry",
+    "EmbeddingJob",
+]
@@ -1,12 +1,21 @@
 from datetime import datetime
-from typing import Dict, Any, Optional, Set, Type, Union
+from typing import Dict, Any, List, Optional, Set, Tuple, Type, Union
 import os
 from pathlib import Path
-from jinja2 import Template
+from jinja2 import TemplateNotFound
 from sqlalchemy import event, func
 from sqlalchemy.orm import relationship, Session, foreign, remote
 from functools import wraps
-from openai import OpenAI
+from app.config import Config
+from app.core.embedding_cache import (
+    content_hash,
+    embedding_cache,
+    query_embedding_cache,
+)
+from app.core.embedding_worker import embedding_worker
+from app.core.templates import from_string, get_template
+from app.utils.text_chunker import TextChunker
+from ..embedding_job import EmbeddingJob
 from ..vector_embedding import VectorEmbedding
 from sqlalchemy import and_
 
@@ -43,6 +52,7 @@ class VectorizableConfiguration:
         auto_sync: bool = True,
         chunking: Optional[Dict] = None,
         template: Optional[str] = None,
+        dimensions: Optional[int] = None,
     ) -> None:
         """Configure vector embedding for a field"""
         cls._ensure_configurations()  # Ensure configurations exist
@@ -53,6 +63,7 @@ class VectorizableConfiguration:
             "auto_sync": auto_sync,
             "chunking": normalized_chunking,
             "template": template,
+            "dimensions": dimensions,
         }
 
     @classmethod
@@ -77,20 +88,34 @@ class VectorizableConfiguration:
             "metadata": chunking.get("metadata", False),
         }
 
+    def template_item(self) -> Any:
+        """Object rendered as `item` by this record's embedding templates"""
+        return self
+
+    @classmethod
+    def template_items(cls, session, records: List[Any]) -> Dict[int, Any]:
+        """Template items for many records, keyed by id
+
+        Models whose templates walk relationships override this to load
+        everything in a few set-based queries instead of per-record lazy
+        loads.
+        """
+        return {record.id: record.template_item() for record in records}
+
     def render_template(self, template_path: str, item: Any) -> str:
         """Render a template with the given item"""
         if not isinstance(template_path, str):
             raise ValueError("Template path must be a string")
 
         if self.registered_templates.get(template_path):
-            template_content = self.registered_templates[template_path]
+            template = from_string(self.registered_templates[template_path])
         else:
-            template_file = Path("app/views") / template_path
-            if not template_file.exists():
+            try:
+                template = get_template(template_path)
+            except TemplateNotFound:
+                template_file = Config.TEMPLATE_DIR / template_path
                 raise ValueError(f"Template not found at path: {template_file}")
-            template_content = template_file.read_text()
 
-        template = Template(template_content)
         return template.render(item=item)
 
 
@@ -113,10 +138,43 @@ class VectorizableSync:
         session.commit()
 
     def queue_embedding_sync(self, field_name: Optional[str] = None) -> None:
-        """Queue embedding sync for async processing"""
-        if self.should_sync_embedding(field_name):
-            # Here you would integrate with your async task system (Celery, etc.)
-            pass
+        """Queue embedding sync for the background worker
+
+        Services call this explicitly after saving a record; it is the
+        only path that enqueues jobs. Repeated calls for the same record
+        coalesce into one job, so a burst of saves costs a single sync of
+        the latest content.
+        """
+        session = Session.object_session(self)
+        if not session:
+            raise ValueError("No session found for object")
+
+        if field_name:
+            config = self.vector_configurations.get(field_name)
+            if not config:
+                raise ValueError(f"No vector configuration found for {field_name}")
+            if not config["auto_sync"]:
+                return
+        elif not any(c["auto_sync"] for c in self.vector_configurations.values()):
+            return
+
+        EmbeddingJob.enqueue(
+            session, self.__class__.__name__, self.id, field_name or ""
+        )
+        session.commit()
+        embedding_worker.wake()
+
+    @classmethod
+    def queue_embedding_syncs(cls, session, ids: List[int], delay: float = 0) -> None:
+        """Queue syncs of all fields for many records by id
+
+        The jobs are added to the caller's transaction and run once it
+        commits. See `EmbeddingJob.enqueue` for how `delay` batches them.
+        """
+        if not any(c["auto_sync"] for c in cls.vector_configurations.values()):
+            return
+        for record_id in sorted(set(ids)):
+            EmbeddingJob.enqueue(session, cls.__name__, record_id, "", delay=delay)
 
     def should_sync_embedding(self, field_name: Optional[str] = None) -> bool:
         """Check if embedding should be synced"""
@@ -140,6 +198,18 @@ class VectorizableSync:
 
     def _sync_single_embedding(self, field_name: str) -> None:
         """Sync embedding for a single field"""
+        self._embed_pending(self._pending_embeddings(field_name))
+
+    def _pending_embeddings(
+        self, field_name: str, item: Any = None
+    ) -> List[Dict[str, Any]]:
+        """Diff a field's chunks against its stored rows
+
+        Rows whose position and content hash still match are kept as they
+        are, rows past the new chunk count are deleted in one statement,
+        and the new or changed chunks are returned to be embedded.
+        `item` is a prefetched template item (see `template_items`).
+        """
         print(f"Syncing embedding for field: {field_name}")  # Debug
         config = self.vector_configurations.get(field_name)
         if not config:
@@ -149,40 +219,67 @@ class VectorizableSync:
         content = getattr(self, field_name)
         if not content:
             print(f"No content found for field {field_name}")  # Debug
-            return
+            return []
+
+        if config["template"]:
+            if item is None:
+                item = self.template_item()
+            content = self.render_template(config["template"], item)
+            print(f"Rendered template content length: {len(content)}")  # Debug
+
+        if config["chunking"]:
+            print("Using chunked embedding")  # Debug
+            chunks = self._chunk_content(content, config)
+        else:
+            print("Using single vector embedding")  # Debug
+            chunks = [(content, {})]
 
         # Get the session
         session = Session.object_session(self)
-
-        # Delete existing embeddings using the session query
-        session.query(VectorEmbedding).filter_by(
+        rows = session.query(VectorEmbedding).filter_by(
             vectorizable_type=self.__class__.__name__,
             vectorizable_id=self.id,
             field_name=field_name,
-        ).delete()
+        )
 
-        # Clear the relationship
+        # Delete rows past the end of the new chunk list in one statement
+        rows.filter(VectorEmbedding.chunk_index >= len(chunks)).delete()
+        existing = {row.chunk_index: row for row in rows}
         self.vector_embeddings = [
-            ve for ve in self.vector_embeddings if ve.field_name != field_name
+            ve
+            for ve in self.vector_embeddings
+            if ve.field_name != field_name or ve.chunk_index < len(chunks)
         ]
 
-        if config["template"]:
-            content = self.render_template(config["template"], self)
-            print(f"Rendered template content length: {len(content)}")  # Debug
-
-        if config["chunking"]:
-            print("Using chunked embedding")  # Debug
-            self._sync_chunked_embedding(content, field_name, config)
-        else:
-            print("Using single vector embedding")  # Debug
-            self._sync_single_vector(content, field_name, config["model"])
+        pending = []
+        for index, (chunk_content, chunk_metadata) in enumerate(chunks):
+            chunk_hash = content_hash(chunk_content)
+            row = existing.get(index)
+            if row is not None and row.content_hash == chunk_hash:
+                # Unchanged chunk; only its bookkeeping may have moved
+                row.total_chunks = len(chunks)
+                row.embedding_metadata = chunk_metadata
+                continue
+            pending.append(
+                {
+                    "field_name": field_name,
+                    "model": config["model"],
+                    "dimensions": config.get("dimensions"),
+                    "content": chunk_content,
+                    "content_hash": chunk_hash,
+                    "metadata": chunk_metadata,
+                    "chunk_index": index,
+                    "total_chunks": len(chunks),
+                    "record": self,
+                    "row": row,
+                }
+            )
 
-    def _sync_chunked_embedding(
-        self, content: str, field_name: str, config: Dict
-    ) -> None:
-        """Sync chunked embeddings"""
-        from text_chunker import TextChunker  # Import your chunking implementation
+        print(f"Re-embedding {len(pending)} of {len(chunks)} chunks")  # Debug
+        return pending
 
+    def _chunk_content(self, content: str, config: Dict) -> List[Tuple[str, Dict]]:
+        """Split content into (text, metadata) chunks"""
         chunks = TextChunker.chunk(
             content,
             strategy=config["chunking"]["strategy"],
@@ -191,68 +288,74 @@ class VectorizableSync:
             metadata=config["chunking"]["metadata"],
         )
 
-        for index, chunk in enumerate(chunks):
-            chunk_content = chunk["content"] if isinstance(chunk, dict) else chunk
-            chunk_metadata = (
-                chunk["metadata"] if isinstance(chunk, dict) else {"chunk_index": index}
-            )
-
-            vector = self._generate_embedding(chunk_content, config["model"])
-
-            self.vector_embeddings.append(
-                VectorEmbedding(
-                    vectorizable_type=self.__class__.__name__,
-                    vectorizable_id=self.id,
-                    field_name=field_name,
-                    vector=vector,
-                    content=chunk_content,
-                    embedding_metadata=chunk_metadata,
-                    chunk_index=index,
-                    total_chunks=len(chunks),
-                )
+        return [
+            (
+                chunk["content"] if isinstance(chunk, dict) else chunk,
+                chunk["metadata"] if isinstance(chunk, dict) else {"chunk_index": i},
             )
+            for i, chunk in enumerate(chunks)
+        ]
 
-    def _sync_all_fields(self) -> None:
-        """Sync embeddings for all configured fields"""
-        for field_name in self.vector_configurations:
-            self._sync_single_embedding(field_name)
-
-    def _sync_single_vector(self, content: str, field_name: str, model: str) -> None:
-        """Create a single vector embedding"""
-        vector = self._generate_embedding(content, model)
+    @staticmethod
+    def _embed_pending(pending: List[Dict[str, Any]]) -> None:
+        """Embed pending chunks in batched requests, one set per model
 
-        self.vector_embeddings.append(
-            VectorEmbedding(
-                vectorizable_type=self.__class__.__name__,
-                vectorizable_id=self.id,
-                field_name=field_name,
-                vector=vector,
-                content=content,
-                embedding_metadata={},
-                chunk_index=0,
-                total_chunks=1,
+        Chunks whose text was embedded before are served from the
+        embedding cache instead of the API.
+        """
+        by_model: Dict[Tuple[str, Optional[int]], List[Dict[str, Any]]] = {}
+        for item in pending:
+            key = (item["model"], item["dimensions"])
+            by_model.setdefault(key, []).append(item)
+
+        for (model, dimensions), items in by_model.items():
+            vectors = embedding_cache.embed(
+                [item["content"] for item in items], model, dimensions
             )
-        )
-
-    def _generate_embedding(self, content: str, model: str) -> list[float]:
-        """Generate vector embedding using OpenAI's API
+            for item, vector in zip(items, vectors):
+                row, record = item["row"], item["record"]
+                if row is None:
+                    row = VectorEmbedding(
+                        vectorizable_type=record.__class__.__name__,
+                        vectorizable_id=record.id,
+                        field_name=item["field_name"],
+                        chunk_index=item["chunk_index"],
+                    )
+                    record.vector_embeddings.append(row)
+                # Changed chunks are updated in place at the same position
+                row.vector = vector
+                row.content = item["content"]
+                row.content_hash = item["content_hash"]
+                row.embedding_metadata = item["metadata"]
+                row.total_chunks = item["total_chunks"]
 
-        Args:
-            content: The text to embed
-            model: The model name (e.g., "text-embedding-3-small")
+    @classmethod
+    def sync_embeddings(
+        cls, session, records: List[Any], field_name: Optional[str] = None
+    ) -> None:
+        """Sync embeddings for many records of this model at once
 
-        Returns:
-            list[float]: The embedding vector
+        Template items are prefetched for all records together, and every
+        changed chunk goes to the embedder in shared batches.
         """
-        client = OpenAI()  # Uses OPENAI_API_KEY environment variable by default
-
-        response = client.embeddings.create(
-            input=content,
-            model=model,
-            encoding_format="float",  # Returns raw float values
-        )
+        fields = [field_name] if field_name else list(cls.vector_configurations)
+        items = {}
+        if any(cls.vector_configurations.get(f, {}).get("template") for f in fields):
+            items = cls.template_items(session, records)
+
+        pending = []
+        for record in records:
+            for field in fields:
+                pending.extend(record._pending_embeddings(field, items.get(record.id)))
+        cls._embed_pending(pending)
+        session.commit()
 
-        return response.data[0].embedding
+    def _sync_all_fields(self) -> None:
+        """Sync embeddings for all configured fields in shared batches"""
+        pending = []
+        for field_name in self.vector_configurations:
+            pending.extend(self._pending_embeddings(field_name))
+        self._embed_pending(pending)
 
 
 class VectorizableSearch:
@@ -277,14 +380,11 @@ class VectorizableSearch:
         if not session:
             raise ValueError("Session is required")
 
-        # Generate embedding for query
-        client = OpenAI()
-        response = client.embeddings.create(
-            input=query,
-            model=cls.vector_configurations[field_name]["model"],
-            encoding_format="float",
+        # Embed the query, reusing the vector for repeated queries
+        config = cls.vector_configurations[field_name]
+        embedding = query_embedding_cache.embed_query(
+            query, config["model"], config.get("dimensions")
         )
-        embedding = response.data[0].embedding
 
         # Build base query
         base_query = session.query(cls)
@@ -425,11 +525,4 @@ def vectorizable(cls):
                     if ve.field_name != field_name
                 ]
 
-    # Register after_commit event on the Session instead of the model
-    @event.listens_for(Session, "after_commit")
-    def queue_sync_after_commit(session):
-        for obj in session.new | session.dirty:
-            if isinstance(obj, cls):
-                obj.queue_embedding_sync()
-
     return cls
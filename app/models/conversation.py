@@ -0,0 +1,103 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Text, JSON, DateTime, ForeignKey, Index
+from sqlalchemy.orm import relationship
+from .base import Base
+
+
+class Conversation(Base):
+    __tablename__ = "conversations"
+
+    id = Column(Integer, primary_key=True)
+    title = Column(String(255), nullable=False)
+    assistant_name = Column(String(255))
+    model = Column(String(50))
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    messages = relationship(
+        "Message",
+        back_populates="conversation",
+        cascade="all, delete-orphan",
+        order_by="Message.id",
+        lazy="dynamic",
+    )
+
+    @classmethod
+    def recent(cls, session, limit=50):
+        return session.query(cls).order_by(cls.updated_at.desc()).limit(limit).all()
+
+    @classmethod
+    def create(cls, session, **kwargs):
+        instance = cls(**kwargs)
+        session.add(instance)
+        session.commit()
+        return instance
+
+
+class Message(Base):
+    __tablename__ = "messages"
+
+    id = Column(Integer, primary_key=True)
+    conversation_id = Column(
+        Integer, ForeignKey("conversations.id", ondelete="CASCADE"), nullable=False
+    )
+    role = Column(String(20), nullable=False)
+    content = Column(Text, default="")
+    tool_calls = Column(JSON)
+    tool_call_id = Column(String(255))
+    # Display-only data such as the Gradio "Used Tool" title
+    message_metadata = Column(JSON, default=dict)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    conversation = relationship("Conversation", back_populates="messages")
+
+    __table_args__ = (
+        Index("index_messages_on_conversation_id_and_id", conversation_id, id),
+    )
+
+    @classmethod
+    def for_conversation(cls, session, conversation_id):
+        """All messages of a conversation in insertion order"""
+        return (
+            session.query(cls)
+            .filter_by(conversation_id=conversation_id)
+            .order_by(cls.id)
+            .all()
+        )
+
+    @classmethod
+    def latest(cls, session, conversation_id, limit):
+        """The newest `limit` messages, returned oldest first"""
+        rows = (
+            session.query(cls)
+            .filter_by(conversation_id=conversation_id)
+            .order_by(cls.id.desc())
+            .limit(limit)
+            .all()
+        )
+        return list(reversed(rows))
+
+    @classmethod
+    def count(cls, session, conversation_id):
+        return session.query(cls).filter_by(conversation_id=conversation_id).count()
+
+    def to_openai(self):
+        """Format for the chat completions API"""
+        message = {"role": self.role, "content": self.content or ""}
+        if self.tool_calls:
+            message["tool_calls"] = self.tool_calls
+        if self.tool_call_id:
+            message["tool_call_id"] = self.tool_call_id
+        return message
+
+    def to_display(self):
+        """Format for a `gr.Chatbot(type="messages")` value"""
+        # Tool results are shown as assistant messages with a title
+        role = "user" if self.role == "user" else "assistant"
+        content = self.content or ""
+        if self.tool_calls and not content:
+            content = "Let me use some tools to help answer that."
+        message = {"role": role, "content": content}
+        if self.message_metadata:
+            message["metadata"] = self.message_metadata
+        return message
@@ -49,10 +49,8 @@ class Document(Base):
         session.add(instance)
         session.commit()
         print(f"Document created with ID: {instance.id}")  # Debug
-        instance.sync_embedding()
-        print(
-            f"Vector embeddings synced. Count: {len(instance.vector_embeddings)}"
-        )  # Debug
+        instance.queue_embedding_sync()
+        print("Vector embedding sync queued")  # Debug
         return instance
 
     def update(self, session, **kwargs):
@@ -61,10 +59,8 @@ class Document(Base):
             setattr(self, key, value)
         session.commit()
         print(f"Document updated")  # Debug
-        self.sync_embedding()
-        print(
-            f"Vector embeddings synced. Count: {len(self.vector_embeddings)}"
-        )  # Debug
+        self.queue_embedding_sync()
+        print("Vector embedding sync queued")  # Debug
         return self
 
     @classmethod
@@ -0,0 +1,100 @@
+from datetime import datetime
+from typing import Dict, List
+from sqlalchemy import Column, Integer, String, DateTime, Index
+from sqlalchemy.dialects.postgresql import insert
+from pgvector.sqlalchemy import Vector
+from .base import Base
+
+
+class EmbeddingCacheEntry(Base):
+    """An embedding keyed by the content it was computed from"""
+
+    __tablename__ = "embedding_cache"
+
+    id = Column(Integer, primary_key=True)
+    model = Column(String(255), nullable=False)
+    dimensions = Column(Integer, nullable=False)
+    # sha256 of the normalized text
+    content_hash = Column(String(64), nullable=False)
+    # Unsized, since dimensions vary by model
+    vector = Column(Vector(), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_used_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index(
+            "index_embedding_cache_on_key",
+            model,
+            dimensions,
+            content_hash,
+            unique=True,
+        ),
+        Index("index_embedding_cache_on_last_used_at", last_used_at),
+    )
+
+    @classmethod
+    def lookup(
+        cls, session, model: str, dimensions: int, hashes: List[str]
+    ) -> Dict[str, List[float]]:
+        """Return cached vectors by hash and mark them as used"""
+        if not hashes:
+            return {}
+        entries = (
+            session.query(cls)
+            .filter(
+                cls.model == model,
+                cls.dimensions == dimensions,
+                cls.content_hash.in_(hashes),
+            )
+            .all()
+        )
+        cls.touch(session, model, dimensions, [e.content_hash for e in entries])
+        return {e.content_hash: list(e.vector) for e in entries}
+
+    @classmethod
+    def touch(cls, session, model: str, dimensions: int, hashes: List[str]) -> None:
+        """Mark entries as used now, so eviction keeps them"""
+        if not hashes:
+            return
+        session.query(cls).filter(
+            cls.model == model,
+            cls.dimensions == dimensions,
+            cls.content_hash.in_(hashes),
+        ).update({cls.last_used_at: datetime.utcnow()}, synchronize_session=False)
+
+    @classmethod
+    def store(
+        cls, session, model: str, dimensions: int, vectors: Dict[str, List[float]]
+    ) -> None:
+        """Insert vectors by hash, leaving existing entries untouched"""
+        if not vectors:
+            return
+        now = datetime.utcnow()
+        session.execute(
+            insert(cls)
+            .values(
+                [
+                    {
+                        "model": model,
+                        "dimensions": dimensions,
+                        "content_hash": content_hash,
+                        "vector": vector,
+                        "created_at": now,
+                        "last_used_at": now,
+                    }
+                    for content_hash, vector in vectors.items()
+                ]
+            )
+            .on_conflict_do_nothing(
+                index_elements=["model", "dimensions", "content_hash"]
+            )
+        )
+
+    @classmethod
+    def evict_unused(cls, session, cutoff: datetime) -> int:
+        """Delete entries not used since `cutoff`"""
+        return (
+            session.query(cls)
+            .filter(cls.last_used_at < cutoff)
+            .delete(synchronize_session=False)
+        )
@@ -0,0 +1,173 @@
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
+from sqlalchemy import and_, case, func, or_
+from sqlalchemy.dialects.postgresql import insert
+from .base import Base
+
+
+class EmbeddingJob(Base):
+    """A pending or finished embedding sync for one record field
+
+    There is at most one row per (record, field): enqueueing again while a
+    job is pending just bumps `enqueued_at`, so repeated saves coalesce
+    into a single sync. `field_name` is "" for "all configured fields".
+    """
+
+    __tablename__ = "embedding_jobs"
+
+    id = Column(Integer, primary_key=True)
+    vectorizable_type = Column(String(255), nullable=False)
+    vectorizable_id = Column(Integer, nullable=False)
+    field_name = Column(String(255), nullable=False, default="")
+    # pending, running, done or failed
+    status = Column(String(20), nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text)
+    enqueued_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # Not claimed before this time; NULL means as soon as possible
+    run_after = Column(DateTime)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+
+    __table_args__ = (
+        Index(
+            "index_embedding_jobs_on_record",
+            vectorizable_type,
+            vectorizable_id,
+            field_name,
+            unique=True,
+        ),
+        Index("index_embedding_jobs_on_status", status, enqueued_at),
+    )
+
+    @classmethod
+    def enqueue(
+        cls,
+        session,
+        vectorizable_type: str,
+        vectorizable_id: int,
+        field_name: str,
+        delay: float = 0,
+    ) -> None:
+        """Queue a sync, coalescing with any existing job for the record
+
+        A job that is already running keeps running; the newer
+        `enqueued_at` tells the worker to run it again when it finishes.
+        With a `delay`, a new job waits that long before it can be
+        claimed, while enqueueing onto a pending job keeps its start time,
+        so changes arriving within the window are synced together.
+        """
+        now = datetime.utcnow()
+        table = cls.__table__
+        running = table.c.status == "running"
+        run_after = now + timedelta(seconds=delay) if delay else None
+        if run_after:
+            next_run = case(
+                (table.c.status == "pending", table.c.run_after), else_=run_after
+            )
+        else:
+            next_run = None
+        session.execute(
+            insert(cls)
+            .values(
+                vectorizable_type=vectorizable_type,
+                vectorizable_id=vectorizable_id,
+                field_name=field_name,
+                status="pending",
+                attempts=0,
+                enqueued_at=now,
+                run_after=run_after,
+            )
+            .on_conflict_do_update(
+                index_elements=["vectorizable_type", "vectorizable_id", "field_name"],
+                set_={
+                    "enqueued_at": now,
+                    "status": case((running, "running"), else_="pending"),
+                    "attempts": case((running, table.c.attempts), else_=0),
+                    "last_error": None,
+                    "finished_at": None,
+                    "run_after": next_run,
+                },
+            )
+        )
+
+    @classmethod
+    def claim(
+        cls, session, limit: int, lease: timedelta, retry_delay: timedelta
+    ) -> List[Dict]:
+        """Lock and mark up to `limit` runnable jobs as running
+
+        Jobs left running past `lease` (e.g. by a crashed worker) are
+        runnable again, and failed attempts wait `retry_delay` before the
+        next one. SKIP LOCKED lets several workers claim at once.
+        """
+        now = datetime.utcnow()
+        jobs = (
+            session.query(cls)
+            .filter(
+                or_(
+                    and_(
+                        cls.status == "pending",
+                        or_(
+                            cls.finished_at.is_(None),
+                            cls.finished_at < now - retry_delay,
+                        ),
+                        or_(cls.run_after.is_(None), cls.run_after <= now),
+                    ),
+                    and_(cls.status == "running", cls.started_at < now - lease),
+                )
+            )
+            .order_by(cls.enqueued_at)
+            .with_for_update(skip_locked=True)
+            .limit(limit)
+            .all()
+        )
+        for job in jobs:
+            job.status = "running"
+            job.started_at = now
+            job.attempts += 1
+        return [
+            {
+                "id": job.id,
+                "vectorizable_type": job.vectorizable_type,
+                "vectorizable_id": job.vectorizable_id,
+                "field_name": job.field_name,
+                "enqueued_at": job.enqueued_at,
+                "attempts": job.attempts,
+            }
+            for job in jobs
+        ]
+
+    @classmethod
+    def finish(
+        cls, session, job: Dict, status: str, error: Optional[str] = None
+    ) -> None:
+        """Record a job's outcome, unless it was re-enqueued meanwhile"""
+        requeued = cls.enqueued_at != job["enqueued_at"]
+        session.query(cls).filter(cls.id == job["id"]).update(
+            {
+                cls.status: case((requeued, "pending"), else_=status),
+                cls.attempts: case((requeued, 0), else_=cls.attempts),
+                cls.last_error: error,
+                cls.finished_at: case((requeued, None), else_=datetime.utcnow()),
+            },
+            synchronize_session=False,
+        )
+
+    @classmethod
+    def for_record(cls, session, vectorizable_type: str, vectorizable_id: int):
+        return (
+            session.query(cls)
+            .filter_by(
+                vectorizable_type=vectorizable_type, vectorizable_id=vectorizable_id
+            )
+            .order_by(cls.enqueued_at.desc())
+            .all()
+        )
+
+    @classmethod
+    def counts(cls, session) -> Dict[str, int]:
+        return dict(
+            session.query(cls.status, func.count(cls.id)).group_by(cls.status).all()
+        )
@@ -1,9 +1,30 @@
-from sqlalchemy import Column, Integer, String, Text, Table, ForeignKey
-from sqlalchemy.orm import relationship
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+from sqlalchemy import Column, Integer, String, Text, Table, ForeignKey, or_
+from sqlalchemy.orm import relationship, object_session
 from .base import Base
 from .concerns.vectorizable import vectorizable
 
 
+@dataclass
+class NodeView:
+    """A node and its edges as plain data, for rendering templates"""
+
+    id: int
+    name: str
+    node_type: str
+    description: Optional[str] = None
+    outgoing_edges: List["EdgeView"] = field(default_factory=list)
+    incoming_edges: List["EdgeView"] = field(default_factory=list)
+
+
+@dataclass
+class EdgeView:
+    source: NodeView
+    target: NodeView
+    relationship_type: str
+
+
 # Define the Edge model class
 class Edge(Base):
     __tablename__ = "edges"
@@ -52,6 +73,50 @@ class Node(Base):
         )
         return edge
 
+    def template_item(self) -> NodeView:
+        return self.template_items(object_session(self), [self])[self.id]
+
+    @classmethod
+    def template_items(cls, session, records: List[Any]) -> Dict[int, NodeView]:
+        """Build NodeViews for many nodes with two queries
+
+        One query loads every edge touching the nodes and another the
+        names of neighbors not among them, instead of lazy-loading each
+        edge's endpoints while rendering.
+        """
+        views = {
+            node.id: NodeView(node.id, node.name, node.node_type, node.description)
+            for node in records
+        }
+        ids = list(views)
+        edges = (
+            session.query(Edge)
+            .filter(or_(Edge.source_id.in_(ids), Edge.target_id.in_(ids)))
+            .order_by(Edge.source_id, Edge.target_id, Edge.relationship_type)
+            .all()
+        )
+
+        neighbor_ids = {e.source_id for e in edges} | {e.target_id for e in edges}
+        neighbor_ids -= views.keys()
+        neighbors = {}
+        if neighbor_ids:
+            rows = session.query(cls.id, cls.name, cls.node_type).filter(
+                cls.id.in_(neighbor_ids)
+            )
+            neighbors = {row.id: NodeView(*row) for row in rows}
+
+        for edge in edges:
+            source = views.get(edge.source_id) or neighbors.get(edge.source_id)
+            target = views.get(edge.target_id) or neighbors.get(edge.target_id)
+            if source is None or target is None:
+                continue
+            view = EdgeView(source, target, edge.relationship_type)
+            if edge.source_id in views:
+                views[edge.source_id].outgoing_edges.append(view)
+            if edge.target_id in views:
+                views[edge.target_id].incoming_edges.append(view)
+        return views
+
     @classmethod
     def semantic_search(cls, query, session, limit=5):
         """Search nodes by semantic similarity"""
@@ -0,0 +1,39 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Text, JSON, DateTime, Boolean, Float
+from sqlalchemy import Index
+from .base import Base
+
+
+class ToolCall(Base):
+    __tablename__ = "tool_calls"
+
+    id = Column(Integer, primary_key=True)
+    tool = Column(String(255), nullable=False)
+    session_id = Column(String(255))
+    arguments = Column(JSON, default=dict)
+    # Serialized and truncated; full results are not kept
+    result_preview = Column(Text)
+    success = Column(Boolean, nullable=False)
+    cached = Column(Boolean, default=False, nullable=False)
+    duration = Column(Float, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("index_tool_calls_on_created_at", created_at),
+        Index("index_tool_calls_on_tool", tool),
+    )
+
+    @classmethod
+    def page(cls, session, page, page_size):
+        """Most recent calls first"""
+        return (
+            session.query(cls)
+            .order_by(cls.id.desc())
+            .offset(page * page_size)
+            .limit(page_size)
+            .all()
+        )
+
+    @classmethod
+    def count(cls, session):
+        return session.query(cls).count()
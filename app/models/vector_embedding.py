@@ -22,7 +22,7 @@ from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from pgvector.sqlalchemy import Vector
 from .base import Base
-from openai import OpenAI
+from app.core.embedding_cache import query_embedding_cache
 from typing import Optional
 
 
@@ -42,6 +42,8 @@ class VectorEmbedding(Base):
     chunk_index = Column(Integer)
     total_chunks = Column(Integer)
     content = Column(Text)
+    # sha256 of the normalized chunk text, used to skip unchanged chunks
+    content_hash = Column(String(64))
 
     # Define relationships without backrefs
     document = relationship(
@@ -206,14 +208,8 @@ class VectorEmbedding(Base):
         if not session:
             raise ValueError("Session is required")
 
-        # Generate embedding for query
-        client = OpenAI()
-        response = client.embeddings.create(
-            input=query,
-            model="text-embedding-3-small",
-            encoding_format="float",
-        )
-        embedding = response.data[0].embedding
+        # Embed the query, reusing the vector for repeated queries
+        embedding = query_embedding_cache.embed_query(query, "text-embedding-3-small")
 
         # Calculate similarity score
         similarity_score = cls.similarity_score_sql(embedding, metric)
@@ -0,0 +1,69 @@
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from app.models.base import Session
+from app.models.conversation import Conversation, Message
+
+
+class ConversationService:
+    @staticmethod
+    def create_conversation(title: str, assistant_name: str, model: str) -> int:
+        with Session() as session:
+            conversation = Conversation.create(
+                session, title=title[:255], assistant_name=assistant_name, model=model
+            )
+            return conversation.id
+
+    @staticmethod
+    def list_conversations(limit: int = 50) -> List[Tuple[str, int]]:
+        """Return (label, id) pairs for a dropdown, most recent first"""
+        with Session() as session:
+            return [
+                (f"{c.title} ({c.updated_at.strftime('%Y-%m-%d %H:%M')})", c.id)
+                for c in Conversation.recent(session, limit)
+            ]
+
+    @staticmethod
+    def append_messages(conversation_id: int, messages: List[Dict]) -> None:
+        """Append one turn's messages in a single transaction"""
+        with Session() as session:
+            try:
+                for message in messages:
+                    session.add(
+                        Message(
+                            conversation_id=conversation_id,
+                            role=message["role"],
+                            content=message.get("content") or "",
+                            tool_calls=message.get("tool_calls"),
+                            tool_call_id=message.get("tool_call_id"),
+                            message_metadata=message.get("metadata") or {},
+                        )
+                    )
+                conversation = session.get(Conversation, conversation_id)
+                if conversation:
+                    conversation.updated_at = datetime.utcnow()
+                session.commit()
+            except Exception as e:
+                print(f"Error appending messages: {e}")
+                session.rollback()
+                raise
+
+    @staticmethod
+    def get_context_messages(conversation_id: int) -> List[Dict]:
+        """Rebuild the model context for a conversation from the database"""
+        with Session() as session:
+            return [
+                m.to_openai()
+                for m in Message.for_conversation(session, conversation_id)
+            ]
+
+    @staticmethod
+    def get_display_messages(
+        conversation_id: Optional[int], limit: int
+    ) -> Tuple[List[Dict], bool]:
+        """Return the newest `limit` chat messages and whether older ones exist"""
+        if conversation_id is None:
+            return [], False
+        with Session() as session:
+            messages = Message.latest(session, conversation_id, limit)
+            has_more = Message.count(session, conversation_id) > len(messages)
+            return [m.to_display() for m in messages], has_more
@@ -23,9 +23,6 @@ class DocumentService:
                     session, title=title, content=content, published=published
                 )
                 print(f"Document created with ID: {document.id}")  # Debug
-                print(
-                    f"Vector embeddings count: {len(document.vector_embeddings)}"
-                )  # Debug
                 return document
             except Exception as e:
                 print(f"Error creating document: {e}")  # Debug
@@ -40,9 +37,7 @@ class DocumentService:
                 document = Document.find_by_title(session, title)
                 if document:
                     document.update(session, content=content, published=published)
-                    print(
-                        f"Document updated. Vector embeddings count: {len(document.vector_embeddings)}"
-                    )  # Debug
+                    print(f"Document updated: {title}")  # Debug
                     return document
                 print(f"Document not found: {title}")  # Debug
                 return None
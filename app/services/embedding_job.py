@@ -0,0 +1,42 @@
+from typing import Dict, Optional
+from app.models.base import Session
+from app.models.embedding_job import EmbeddingJob
+
+
+class EmbeddingJobService:
+    @staticmethod
+    def get_status(vectorizable_type: str, vectorizable_id: int) -> Optional[Dict]:
+        """Most recently queued embedding job for a record, if any"""
+        with Session() as session:
+            jobs = EmbeddingJob.for_record(session, vectorizable_type, vectorizable_id)
+            if not jobs:
+                return None
+            job = jobs[0]
+            return {
+                "status": job.status,
+                "attempts": job.attempts,
+                "error": job.last_error,
+                "enqueued_at": job.enqueued_at,
+                "finished_at": job.finished_at,
+            }
+
+    @staticmethod
+    def describe_status(vectorizable_type: str, vectorizable_id: int) -> str:
+        """One-line embedding status for display next to a record"""
+        job = EmbeddingJobService.get_status(vectorizable_type, vectorizable_id)
+        if job is None:
+            return "Embeddings: not queued"
+        if job["status"] == "done":
+            return f"Embeddings: up to date (synced {job['finished_at']:%Y-%m-%d %H:%M:%S})"
+        if job["status"] == "failed":
+            return (
+                f"Embeddings: failed after {job['attempts']} attempts ({job['error']})"
+            )
+        if job["status"] == "pending" and job["error"]:
+            return f"Embeddings: retrying ({job['error']})"
+        return f"Embeddings: {job['status']}"
+
+    @staticmethod
+    def get_counts() -> Dict[str, int]:
+        with Session() as session:
+            return EmbeddingJob.counts(session)
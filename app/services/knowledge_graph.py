@@ -1,10 +1,30 @@
+from app.config import Config
 from app.models.base import Session
 from app.models.node import Node, Edge
-from typing import List, Dict, Any, Tuple, Set
-from sqlalchemy import and_
+from typing import Iterable, List, Dict, Any, Tuple, Set
+from sqlalchemy import and_, or_
 
 
 class KnowledgeGraphService:
+    @staticmethod
+    def _neighbor_ids(session, node_id: int) -> Set[int]:
+        edges = session.query(Edge.source_id, Edge.target_id).filter(
+            or_(Edge.source_id == node_id, Edge.target_id == node_id)
+        )
+        return {id for ends in edges for id in ends if id != node_id}
+
+    @staticmethod
+    def _mark_dirty(session, node_ids: Iterable[int]) -> None:
+        """Queue re-embedding of nodes whose rendered description changed
+
+        Node descriptions include their relationships, so edge changes
+        and renames leave neighbors stale. The syncs are debounced so a
+        burst of edits is re-embedded in one batch.
+        """
+        Node.queue_embedding_syncs(
+            session, node_ids, delay=Config.EMBEDDING_GRAPH_DEBOUNCE_SECONDS
+        )
+
     @staticmethod
     def get_all_nodes():
         with Session() as session:
@@ -23,7 +43,10 @@ class KnowledgeGraphService:
                 node = Node(name=name, node_type=node_type, description=description)
                 session.add(node)
                 session.commit()
-                node.sync_embedding()
+                node.queue_embedding_sync()
+                # The sync commits, expiring the node; reload it so callers
+                # can still read it once the session is closed
+                session.refresh(node)
                 return node
             except Exception as e:
                 print(f"Error creating node: {e}")
@@ -36,11 +59,15 @@ class KnowledgeGraphService:
             try:
                 node = session.query(Node).filter_by(id=node_id).first()
                 if node:
+                    if node.name != name:
+                        neighbors = KnowledgeGraphService._neighbor_ids(session, node_id)
+                        KnowledgeGraphService._mark_dirty(session, neighbors)
                     node.name = name
                     node.node_type = node_type
                     node.description = description
                     session.commit()
-                    node.sync_embedding()
+                    node.queue_embedding_sync()
+                    session.refresh(node)
                     return node
                 return None
             except Exception as e:
@@ -54,6 +81,8 @@ class KnowledgeGraphService:
             try:
                 node = session.query(Node).filter_by(id=node_id).first()
                 if node:
+                    neighbors = KnowledgeGraphService._neighbor_ids(session, node_id)
+                    KnowledgeGraphService._mark_dirty(session, neighbors)
                     session.delete(node)
                     session.commit()
                     return True
@@ -72,6 +101,7 @@ class KnowledgeGraphService:
                 if source and target:
                     edge = source.add_edge(target, relationship_type)
                     session.add(edge)
+                    KnowledgeGraphService._mark_dirty(session, [source_id, target_id])
                     session.commit()
                     return edge
                 return None
@@ -80,6 +110,28 @@ class KnowledgeGraphService:
                 session.rollback()
                 raise
 
+    @staticmethod
+    def delete_edge(source_id: int, target_id: int, relationship_type: str):
+        with Session() as session:
+            try:
+                deleted = (
+                    session.query(Edge)
+                    .filter_by(
+                        source_id=source_id,
+                        target_id=target_id,
+                        relationship_type=relationship_type,
+                    )
+                    .delete()
+                )
+                if deleted:
+                    KnowledgeGraphService._mark_dirty(session, [source_id, target_id])
+                session.commit()
+                return bool(deleted)
+            except Exception as e:
+                print(f"Error deleting edge: {e}")
+                session.rollback()
+                raise
+
     @staticmethod
     def semantic_search(
         query: str, session: Session, limit: int = 3
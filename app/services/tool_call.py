@@ -0,0 +1,69 @@
+from typing import Dict, List, Tuple
+from sqlalchemy import func, case
+from app.models.base import Session
+from app.models.tool_call import ToolCall
+
+
+class ToolCallService:
+    @staticmethod
+    def record_calls(entries: List[Dict]) -> None:
+        """Insert a batch of tool call records"""
+        with Session() as session:
+            try:
+                session.add_all([ToolCall(**entry) for entry in entries])
+                session.commit()
+            except Exception as e:
+                print(f"Error recording tool calls: {e}")
+                session.rollback()
+                raise
+
+    @staticmethod
+    def get_page(page: int, page_size: int) -> Tuple[List[Dict], int]:
+        """Return one page of calls (newest first) and the total count"""
+        with Session() as session:
+            calls = [
+                {
+                    "tool": call.tool,
+                    "session_id": call.session_id,
+                    "arguments": call.arguments,
+                    "result": call.result_preview,
+                    "success": call.success,
+                    "cached": call.cached,
+                    "duration": call.duration,
+                    "timestamp": call.created_at,
+                }
+                for call in ToolCall.page(session, page, page_size)
+            ]
+            return calls, ToolCall.count(session)
+
+    @staticmethod
+    def count_calls() -> int:
+        with Session() as session:
+            return ToolCall.count(session)
+
+    @staticmethod
+    def get_stats() -> List[Dict]:
+        """Per-tool call counts, error rates and p50/p95 durations"""
+        with Session() as session:
+            rows = (
+                session.query(
+                    ToolCall.tool,
+                    func.count(ToolCall.id),
+                    func.sum(case((ToolCall.success.is_(False), 1), else_=0)),
+                    func.percentile_cont(0.5).within_group(ToolCall.duration),
+                    func.percentile_cont(0.95).within_group(ToolCall.duration),
+                )
+                .group_by(ToolCall.tool)
+                .order_by(func.count(ToolCall.id).desc())
+                .all()
+            )
+            return [
+                {
+                    "Tool": tool,
+                    "Calls": calls,
+                    "Error Rate": f"{errors / calls:.1%}",
+                    "p50 (s)": f"{p50:.2f}",
+                    "p95 (s)": f"{p95:.2f}",
+                }
+                for tool, calls, errors, p50, p95 in rows
+            ]
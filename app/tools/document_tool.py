@@ -3,7 +3,7 @@ from app.models.base import Session
 from app.models.document import Document
 
 
-@tool
+@tool(compaction="snippets", timeout=30, max_concurrency=8)
 def search_documents(
     query: str, limit: int = 5, metric: str = "cosine", threshold: float = None
 ):
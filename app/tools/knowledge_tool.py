@@ -3,7 +3,7 @@ from app.models.base import Session
 from app.services.knowledge_graph import KnowledgeGraphService
 
 
-@tool
+@tool(compaction="structure", timeout=30, max_concurrency=8)
 def search_knowledge_graph(query: str, max_hops: int = 2):
     """
     Search the knowledge graph using semantic search and explore relationships.
@@ -2,11 +2,13 @@ from app.core.tools import tool
 import ast
 
 
-@tool
-def python(code: str, kernel=None):
+# The kernel writes long output to its own log and returns a preview that
+# fits the budget, so results are only truncated here as a last resort
+@tool(compaction="truncate", timeout=120, max_concurrency=4)
+async def python(code: str, kernel=None):
     "Return result of executing `code` using python. Use this to run any kinds of complex calculations, computation, data analysis, etc."
     if not kernel:
         return {"error": "Jupyter kernel not initialized"}
 
-    result, _ = kernel.execute_code(code)
+    result, _ = await kernel.execute_code_async(code)
     return {"result": result}
@@ -1,35 +1,66 @@
 from app.core.tools import tool
-import requests
-from requests import HTTPError
+from app.core.http import fetch_json
+from app.core.gazetteer import lookup
+import asyncio
+import httpx
 
 
-@tool
-def geocode(city_name: str):
+@tool(
+    cache_ttl=24 * 60 * 60,
+    cache_key=lambda city_name: city_name.strip().lower(),
+    timeout=20,
+)
+async def geocode(city_name: str):
     "Geocodes a city name into latitude and longitude data"
-    url = f"https://geocoding-api.open-meteo.com/v1/search?name={city_name}&count=10&language=en&format=json"
+    # The lookup may build the index on first use, so keep it off the loop
+    places = await asyncio.to_thread(lookup, city_name)
+    if places:
+        return {"results": places, "source": "gazetteer"}
+
+    url = "https://geocoding-api.open-meteo.com/v1/search"
+    params = {"name": city_name, "count": 10, "language": "en", "format": "json"}
 
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-    except requests.HTTPError as http_err:
+        data = await fetch_json(url, params)
+    except httpx.HTTPStatusError as http_err:
         print(f"HTTP error occurred: {http_err}")
+        data = {"error": str(http_err)}
     except Exception as err:
         print(f"Other error occurred: {err}")
-    else:
-        return response.json()
+        data = {"error": str(err)}
+    if data.get("results"):
+        return data
+
+    # Close spellings are only a fallback when open-meteo has nothing
+    places = await asyncio.to_thread(lookup, city_name, fuzzy=True)
+    if places:
+        return {"results": places, "source": "gazetteer", "match": "fuzzy"}
+    return data
 
 
-@tool
-def weather(latitude: float, longitude: float):
+@tool(
+    cache_ttl=10 * 60,
+    cache_key=lambda latitude, longitude: (
+        round(float(latitude), 2),
+        round(float(longitude), 2),
+    ),
+    timeout=20,
+)
+async def weather(latitude: float, longitude: float):
     "Returns the weather conditions for a given latitude and longitude"
-    url = f"https://api.open-meteo.com/v1/forecast?latitude={latitude}&longitude={longitude}&current=temperature_2m,is_day,precipitation,rain,showers,snowfall&timezone=America%2FChicago"
+    url = "https://api.open-meteo.com/v1/forecast"
+    params = {
+        "latitude": latitude,
+        "longitude": longitude,
+        "current": "temperature_2m,is_day,precipitation,rain,showers,snowfall",
+        "timezone": "America/Chicago",
+    }
 
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-    except HTTPError as http_err:
+        return await fetch_json(url, params)
+    except httpx.HTTPStatusError as http_err:
         print(f"HTTP error occurred: {http_err}")
+        return {"error": str(http_err)}
     except Exception as err:
         print(f"Other error occurred: {err}")
-    else:
-        return response.json()
+        return {"error": str(err)}
@@ -2,6 +2,8 @@ from datetime import datetime
 from typing import Callable, Dict, Any
 from functools import wraps
 import geocoder
+from app.config import Config
+from app.utils.lru import LRUCache, MISSING
 
 
 class MagicVariableManager:
@@ -77,8 +79,20 @@ def get_current_time() -> str:
     return datetime.now().strftime("%I:%M %p")
 
 
+# The IP lookup is a network round trip, and the answer rarely changes
+_user_location_cache = LRUCache(max_entries=1, ttl=Config.USER_LOCATION_TTL)
+
+
 @magic_variable("user_location")
 def get_user_location() -> str:
     """Returns the user's location based on IP address"""
-    g = geocoder.ip("me")
-    return f"{g.city}, {g.state}"
+    if Config.USER_LOCATION:
+        return Config.USER_LOCATION
+
+    location = _user_location_cache.get("me")
+    if location is MISSING:
+        g = geocoder.ip("me")
+        location = f"{g.city}, {g.state}"
+        if g.ok:
+            _user_location_cache.set("me", location)
+    return location
@@ -0,0 +1,37 @@
+import time
+
+
+class StreamCoalescer:
+    """Batch streamed text deltas so the UI is only updated on a cadence.
+
+    Gradio re-sends the chatbot value on every yield, so yielding per token
+    makes the cost grow with the length of the conversation. The coalescer
+    signals a flush once ``interval`` seconds have passed or ``max_chars``
+    characters are pending, whichever comes first.
+    """
+
+    def __init__(self, interval: float = 0.05, max_chars: int = 64):
+        self.interval = interval
+        self.max_chars = max_chars
+        self.pending_chars = 0
+        self.last_flush = time.monotonic()
+
+    def push(self, text: str) -> bool:
+        """Record a delta and return True when the caller should yield"""
+        self.pending_chars += len(text)
+        if (
+            self.pending_chars >= self.max_chars
+            or time.monotonic() - self.last_flush >= self.interval
+        ):
+            self.flush()
+            return True
+        return False
+
+    def flush(self) -> None:
+        """Mark pending text as delivered"""
+        self.pending_chars = 0
+        self.last_flush = time.monotonic()
+
+    @property
+    def has_pending(self) -> bool:
+        return self.pending_chars > 0
@@ -0,0 +1,179 @@
+import re
+from collections import deque
+from typing import Deque, Dict, Iterator, List, Tuple, Union
+
+from app.utils.tokenizer import count_tokens, decode, encode
+
+# (start offset in the source text, text, token count)
+Piece = Tuple[int, str, int]
+
+_PARAGRAPH = re.compile(r"\n\s*\n")
+_LINE = re.compile(r"\n")
+_SENTENCE = re.compile(r"(?<=[.!?])\s+")
+_WORD = re.compile(r"\s+")
+
+# Separators tried in order, coarsest first; a piece still over the token
+# budget after the last one is cut into raw token windows
+_SEPARATORS = {
+    "recursive": [_PARAGRAPH, _LINE, _SENTENCE, _WORD],
+    "sentence": [_SENTENCE, _WORD],
+}
+
+# Pieces longer than this many characters per allowed token are split
+# further without being tokenized first; it only saves work, since the
+# smaller pieces are packed back together
+_MAX_CHARS_PER_TOKEN = 16
+
+# The fixed strategy tokenizes this many characters at a time
+_BLOCK_CHARS = 1 << 16
+
+
+class TextChunker:
+    """Token-aware text chunking for embeddings
+
+    Strategies:
+        recursive: split on paragraphs, then lines, sentences and words,
+            and pack the pieces into chunks of up to `max_tokens`
+        sentence: the same, starting from sentence boundaries
+        fixed: windows of exactly `max_tokens` tokens
+
+    Chunks are yielded one at a time, and consecutive chunks share about
+    `overlap` tokens. Separators stay attached to the start of the
+    following piece, which is where tiktoken puts them too, so per-piece
+    token counts add up to the count for the joined chunk.
+    """
+
+    STRATEGIES = ("recursive", "sentence", "fixed")
+
+    @classmethod
+    def chunk(
+        cls,
+        text: str,
+        strategy: str = "recursive",
+        max_tokens: int = 100,
+        overlap: int = 10,
+        metadata: bool = False,
+    ) -> Iterator[Union[str, Dict]]:
+        """Yield chunks of `text`, as dicts with offsets if `metadata`"""
+        if strategy not in cls.STRATEGIES:
+            raise ValueError(f"Unknown chunking strategy: {strategy}")
+        if max_tokens < 1:
+            raise ValueError("max_tokens must be positive")
+        if not 0 <= overlap < max_tokens:
+            raise ValueError("overlap must be at least 0 and less than max_tokens")
+
+        return cls._chunks(text, strategy, max_tokens, overlap, metadata)
+
+    @classmethod
+    def _chunks(
+        cls, text: str, strategy: str, max_tokens: int, overlap: int, metadata: bool
+    ) -> Iterator[Union[str, Dict]]:
+        if strategy == "fixed":
+            chunks = _token_windows(text, 0, max_tokens, overlap)
+        else:
+            pieces = _pieces(text, 0, max_tokens, _SEPARATORS[strategy])
+            chunks = _pack(pieces, max_tokens, overlap)
+
+        index = 0
+        for start, content, tokens in chunks:
+            if not content.strip():
+                continue
+            if metadata:
+                yield {
+                    "content": content,
+                    "metadata": {
+                        "chunk_index": index,
+                        "start_char": start,
+                        "end_char": start + len(content),
+                        "token_count": tokens,
+                        "strategy": strategy,
+                    },
+                }
+            else:
+                yield content
+            index += 1
+
+
+def _split(text: str, offset: int, separator: re.Pattern) -> Iterator[Tuple[int, str]]:
+    """Split before each separator match, keeping every character"""
+    start = 0
+    for match in separator.finditer(text):
+        if match.start() > start:
+            yield offset + start, text[start : match.start()]
+            start = match.start()
+    if start < len(text):
+        yield offset + start, text[start:]
+
+
+def _pieces(
+    text: str, offset: int, max_tokens: int, separators: List[re.Pattern]
+) -> Iterator[Piece]:
+    """Yield pieces of at most `max_tokens`, splitting only where needed"""
+    for start, piece in _split(text, offset, separators[0]):
+        if len(piece) <= max_tokens * _MAX_CHARS_PER_TOKEN:
+            tokens = count_tokens(piece)
+            if tokens <= max_tokens:
+                yield start, piece, tokens
+                continue
+        if len(separators) > 1:
+            yield from _pieces(piece, start, max_tokens, separators[1:])
+        else:
+            yield from _token_windows(piece, start, max_tokens, 0)
+
+
+def _pack(pieces: Iterator[Piece], max_tokens: int, overlap: int) -> Iterator[Piece]:
+    """Greedily join pieces into chunks, carrying trailing pieces as overlap"""
+    window: Deque[Piece] = deque()
+    tokens = 0
+    unsent = False
+    for piece in pieces:
+        if window and tokens + piece[2] > max_tokens:
+            if unsent:
+                yield _join(window, tokens)
+            while window and (tokens > overlap or tokens + piece[2] > max_tokens):
+                tokens -= window.popleft()[2]
+            unsent = False
+        window.append(piece)
+        tokens += piece[2]
+        unsent = True
+    if unsent:
+        yield _join(window, tokens)
+
+
+def _join(window: Deque[Piece], tokens: int) -> Piece:
+    return window[0][0], "".join(piece[1] for piece in window), tokens
+
+
+def _blocks(text: str, offset: int) -> Iterator[Tuple[int, str]]:
+    """Cut text into blocks that end before whitespace, so that tokenizing
+    block by block matches tokenizing the whole text"""
+    start = 0
+    while start < len(text):
+        end = start + _BLOCK_CHARS
+        if end < len(text):
+            cut = max(text.rfind(" ", start + 1, end), text.rfind("\n", start + 1, end))
+            end = cut if cut > start else end
+        yield offset + start, text[start:end]
+        start = end
+
+
+def _token_windows(text: str, offset: int, size: int, overlap: int) -> Iterator[Piece]:
+    """Yield windows of `size` tokens, `size - overlap` tokens apart
+
+    Text is tokenized a block at a time, so only the current block's
+    tokens are held in memory.
+    """
+    step = size - overlap
+    buffer: List[int] = []
+    start = offset
+    sent = False
+    for _, block in _blocks(text, offset):
+        buffer.extend(encode(block))
+        while len(buffer) >= size:
+            yield start, decode(buffer[:size]), size
+            start += len(decode(buffer[:step]))
+            buffer = buffer[step:]
+            sent = True
+    # Whatever is left, unless it is all overlap already sent
+    if len(buffer) > (overlap if sent else 0):
+        yield start, decode(buffer), len(buffer)
@@ -0,0 +1,24 @@
+from functools import lru_cache
+
+import tiktoken
+
+# gpt-4o family tokenizer; close enough for budgeting the other OpenAI models
+DEFAULT_ENCODING = "o200k_base"
+
+
+@lru_cache(maxsize=None)
+def get_encoding(name: str = DEFAULT_ENCODING) -> tiktoken.Encoding:
+    """Load a tiktoken encoding once per process"""
+    return tiktoken.get_encoding(name)
+
+
+def encode(text: str) -> list[int]:
+    return get_encoding().encode(text, disallowed_special=())
+
+
+def decode(tokens: list[int]) -> str:
+    return get_encoding().decode(tokens)
+
+
+def count_tokens(text: str) -> int:
+    return len(encode(text))
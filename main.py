@@ -7,6 +7,8 @@ from app.config import Config
 # Core service imports
 from app.core.assistant_manager import AssistantManager
 from app.core.websocket import WebSocketManager
+from app.core.kernel_pool import kernel_pool
+from app.core.embedding_worker import embedding_worker
 
 # Service imports
 from app.services.document import DocumentService
@@ -88,4 +90,8 @@ with gr.Blocks(
                 create_knowledge_graph_search_interface(knowledge_graph_service)
 
 if __name__ == "__main__":
+    # Start warming Jupyter kernels so the first python tool call is fast
+    kernel_pool.start()
+    # Drain embedding syncs queued by saves (including any left from a restart)
+    embedding_worker.start()
     demo.launch()
@@ -0,0 +1,48 @@
+import random
+import sys
+import time
+import tracemalloc
+from app.utils.text_chunker import TextChunker
+
+WORDS = (
+    "the quick brown fox jumps over lazy dog embedding vector search "
+    "knowledge graph document chunk token model query result index"
+).split()
+
+
+def make_text(size_chars: int, seed: int = 0) -> str:
+    """Random prose with sentences, lines and paragraphs"""
+    rng = random.Random(seed)
+    parts, length = [], 0
+    while length < size_chars:
+        sentence = " ".join(rng.choices(WORDS, k=rng.randint(5, 25))).capitalize()
+        sentence += rng.choice([". ", "? ", "! ", ".\n", ".\n\n"])
+        parts.append(sentence)
+        length += len(sentence)
+    return "".join(parts)
+
+
+def benchmark_chunker(size_mb: float = 5, max_tokens: int = 256, overlap: int = 32):
+    text = make_text(int(size_mb * 1024 * 1024))
+    print(
+        f"{len(text) / 1024 / 1024:.1f} MB, max_tokens={max_tokens}, overlap={overlap}"
+    )
+
+    for strategy in TextChunker.STRATEGIES:
+        tracemalloc.start()
+        start = time.perf_counter()
+        count = 0
+        for _ in TextChunker.chunk(text, strategy, max_tokens, overlap):
+            count += 1
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(
+            f"{strategy:>10}: {count} chunks in {elapsed:.2f}s "
+            f"({len(text) / 1024 / 1024 / elapsed:.2f} MB/s, "
+            f"{count / elapsed:.0f} chunks/s, peak {peak / 1024 / 1024:.1f} MB)"
+        )
+
+
+if __name__ == "__main__":
+    benchmark_chunker(float(sys.argv[1]) if len(sys.argv) > 1 else 5)
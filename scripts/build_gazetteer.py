@@ -0,0 +1,16 @@
+import sys
+from pathlib import Path
+from app.config import Config
+from app.core.gazetteer import build_index
+
+
+def build_gazetteer(source: Path):
+    # Accepts the bundled seed file or a GeoNames dump such as cities15000.txt
+    count = build_index(
+        source, Config.GAZETTEER_INDEX_PATH, Config.GAZETTEER_ADMIN1_PATH
+    )
+    print(f"Indexed {count} places from {source} into {Config.GAZETTEER_INDEX_PATH}")
+
+
+if __name__ == "__main__":
+    build_gazetteer(Path(sys.argv[1]) if len(sys.argv) > 1 else Config.GAZETTEER_PATH)
@@ -7,6 +7,11 @@ def drop_all_tables():
     print(f"Dropping all tables in database {Config.POSTGRES_DB}...")
     try:
         # Drop tables in order of dependencies
+        Base.metadata.tables["embedding_jobs"].drop(engine, checkfirst=True)
+        Base.metadata.tables["embedding_cache"].drop(engine, checkfirst=True)
+        Base.metadata.tables["tool_calls"].drop(engine, checkfirst=True)
+        Base.metadata.tables["messages"].drop(engine, checkfirst=True)
+        Base.metadata.tables["conversations"].drop(engine, checkfirst=True)
         Base.metadata.tables["vector_embeddings"].drop(engine, checkfirst=True)
         Base.metadata.tables["edges"].drop(engine, checkfirst=True)
         Base.metadata.tables["documents"].drop(engine, checkfirst=True)
@@ -23,6 +28,11 @@ def drop_all_tables():
                 text(
                     """
                     DROP TABLE IF EXISTS 
+                        embedding_jobs,
+                        embedding_cache,
+                        tool_calls,
+                        messages,
+                        conversations,
                         vector_embeddings, 
                         edges, 
                         documents, 
@@ -0,0 +1,19 @@
+from sqlalchemy.sql import text
+from app.models.base import engine
+
+
+def add_content_hash_column():
+    # Existing rows get a NULL hash and are re-embedded on their next sync
+    with engine.connect() as conn:
+        conn.execute(
+            text(
+                "ALTER TABLE vector_embeddings "
+                "ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64)"
+            )
+        )
+        conn.commit()
+    print("Added content_hash column to vector_embeddings")
+
+
+if __name__ == "__main__":
+    add_content_hash_column()
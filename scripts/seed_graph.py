@@ -57,11 +57,6 @@ def seed_database():
         if Config.DEBUG:
             print(f"Vector configurations: {nodes['tolkien'].vector_configurations}")
 
-        # Sync embeddings for all nodes
-        for node in nodes.values():
-            node.sync_embedding()
-            print(f"Created embedding for node: {node.name}")
-
         # Create relationships
         relationships = [
             (nodes["tolkien"], nodes["lotr"], "wrote"),
@@ -79,6 +74,10 @@ def seed_database():
 
         session.commit()
 
+        # Embed after the edges exist, since they appear in node descriptions
+        Node.sync_embeddings(session, list(nodes.values()))
+        print(f"Created embeddings for {len(nodes)} nodes")
+
         print("Database seeded successfully!")
 
         if Config.DEBUG: